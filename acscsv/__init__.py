@@ -1,8 +1,17 @@
 __all__ = [
-        'disqus_acs'
+        'checkpoint'
+        , 'columns'
+        , 'disqus_acs'
+        , 'filters'
         , 'foursquare_acs'
         , 'newsgator_acs'
+        , 'offset_index'
+        , 'output'
+        , 'parallel'
+        , 'profiler'
+        , 'readers'
         , 'reflect_json'
+        , 'stats'
         , 'stocktwits_acs'
         , 'stocktwits_native'
         , 'twitter_acs'
@@ -3,10 +3,20 @@
 __author__="Scott Hendrickson"
 __license__="Simplified BSD"
 
+import re
 import sys
+import time
 import datetime
 import fileinput
 from StringIO import StringIO
+import rawscan
+import jsonstream
+import readers
+import offset_index
+import stats
+import profiler
+import columns
+import collections
 # Experimental: Use numba to speed up some fo the basic function
 # that are run many times per record
 # from numba import jit
@@ -23,6 +33,9 @@ gnipError = "GNIPERROR"
 gnipRemove = "GNIPREMOVE"
 gnipDateTime = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S.000Z")
 INTERNAL_EMPTY_FIELD = "GNIPEMPTYFIELD"
+# keypath value of missing paths, and the key matching every list item, see KeyPathResolver
+KEYPATH_EMPTY = "PATH_EMPTY"
+WILDCARD = "*"
 
 class Singleton(object):
     """
@@ -55,16 +68,25 @@ class _Field(object):
 
     def __init__(self, json_record):
         if self.label == 'DummyKeyPathLabel':
-            self.label = ':'.join(self.path)
+            self.label = ':'.join([str(k) for k in self.path])
         self.value = None                    # str representation of the field, often = str( self.value_list ) 
         if json_record is not None:
-            self.value = self.walk_path(json_record)
+            self.value = self.fix_value(self.walk_path(json_record))
         else:
-            self.value = self.default_value
+            self.value = self.fix_value(self.default_value)
 
     def __repr__(self):
         return unicode(self.value)
 
+    @classmethod
+    def fix_value(cls, value):
+        """
+        Take the value found at the end of the key-path (or default_value) and return the
+        final field value. Subclasses override this instead of the constructor so the same
+        logic is used by ExtractionPlan.
+        """
+        return value
+
     def walk_path(self, json_record, path=None):
         res = json_record
         if path is None:
@@ -72,8 +94,14 @@ class _Field(object):
         for k in path:
             if res is None:
                 break
-            if k not in res or ( type(res[k]) is list and len(res[k]) == 0 ):
-                # parenthetical clause for values with empty lists e.g. twitter_entities
+            if type(k) is int:
+                # integer keys index into lists e.g. gnip.profileLocations[0]
+                if type(res) is not list or len(res) <= k:
+                    return self.default_value
+            elif k not in res:
+                return self.default_value
+            if type(res[k]) is list and len(res[k]) == 0:
+                # values with empty lists e.g. twitter_entities
                 return self.default_value
             res = res[k]
         # handle the special case where the walk_path found null (JSON) which converts to 
@@ -167,17 +195,356 @@ class _LimitedField(_Field):
 # TODO:
 # - consolidate _LimitedField() & fix_length() if possible 
 
-    
+
+class MultiPathExtractor(object):
+    """
+    Extract the values at the end of many key-paths from a JSON record (as a Python dict) 
+    in one pass. The paths are stored in a trie so a shared prefix such as actor or 
+    gnip.profileLocations[0] is looked up once per record, and then fans out to the 
+    remaining keys. Missing values follow the same rules as _Field.walk_path().
+    """
+
+    def __init__(self, paths, defaults=None):
+        """
+        Take a list of key-paths (lists of str keys and int list indexes) and an optional
+        list of default values, one per path. Default values are INTERNAL_EMPTY_FIELD.
+        """
+        if defaults is None:
+            defaults = [ INTERNAL_EMPTY_FIELD ]*len(paths)
+        self.paths = [ tuple(p) for p in paths ]
+        self.defaults = list(defaults)
+        # trie node is [ list of path positions ending here, dict of key -> node ]
+        trie = [[], {}]
+        for i, path in enumerate(self.paths):
+            node = trie
+            for k in path:
+                node = node[1].setdefault(k, [[], {}])
+            node[0].append(i)
+        self.root = self._freeze(trie)
+
+    def _freeze(self, node):
+        """Convert a trie node into nested tuples of (ends, ((key, is_index, child), ...))."""
+        return (tuple(node[0])
+                , tuple([ (k, type(k) is int, self._freeze(child)) 
+                            for k, child in sorted(node[1].items()) ]))
+
+    def extract(self, json_record):
+        """Return the list of values, one per path, found in json_record."""
+        res = list(self.defaults)
+        if json_record is not None:
+            self._walk(json_record, self.root, res)
+        return res
+
+    def _walk(self, x, node, res):
+        ends, children = node
+        for i in ends:
+            res[i] = x
+        for k, is_index, child in children:
+            if is_index:
+                # integer keys index into lists e.g. gnip.profileLocations[0]
+                if type(x) is not list or len(x) <= k:
+                    continue
+            elif k not in x:
+                continue
+            y = x[k]
+            # null values and empty lists (e.g. twitter_entities) keep the default value
+            if y is None or (type(y) is list and len(y) == 0):
+                continue
+            self._walk(y, child, res)
+
+
+class KeyPathResolver(object):
+    """
+    Resolve keypaths given at run time, e.g. actor:languages:0, to output values. Each path
+    is split and its list indexes parsed once, and paths sharing a prefix are looked up 
+    together, as in MultiPathExtractor. A "*" key takes each item of a list (or each value
+    of a dict), so twitter_entities:hashtags:*:text gives the list of all the hashtag texts.
+    """
+
+    def __init__(self, keypaths, delim=":"):
+        self.keypaths = list(keypaths)
+        # trie node is [ list of path positions ending here, dict of key -> node ]
+        trie = [[], {}]
+        for i, keypath in enumerate(self.keypaths):
+            node = trie
+            for k in keypath.split(delim):
+                if k != WILDCARD:
+                    try:
+                        k = int(k)
+                    except ValueError:
+                        # keys are ascii strings
+                        k = str(k)
+                node = node[1].setdefault(k, [[], {}])
+            node[0].append(i)
+        self.root = self._freeze(trie)
+
+    def _freeze(self, node):
+        """
+        Convert a trie node into nested tuples of (ends, ((key, child), ...), positions), 
+        where positions are those of all the paths through the node.
+        """
+        children = tuple([ (k, self._freeze(child)) for k, child in sorted(node[1].items()) ])
+        positions = tuple(node[0]) + sum([ child[2] for k, child in children ], ())
+        return (tuple(node[0]), children, positions)
+
+    def resolve(self, json_record, raw=False):
+        """
+        Return the list of values, one per keypath: the unicode value, the list of unicode 
+        values for paths with a wildcard, or PATH_EMPTY if the path isn't in json_record. 
+        With raw, the values are returned as they are in json_record.
+        """
+        res = [ KEYPATH_EMPTY ]*len(self.keypaths)
+        self._walk(json_record, self.root, res, False, None if raw else unicode)
+        return res
+
+    def _walk(self, x, node, res, many, convert):
+        ends, children, positions = node
+        if ends and convert is not None:
+            x_value = convert(x)
+        else:
+            x_value = x
+        for i in ends:
+            if many:
+                res[i].append(x_value)
+            else:
+                res[i] = x_value
+        for k, child in children:
+            if k == WILDCARD:
+                if type(x) is list:
+                    items = x
+                elif isinstance(x, dict):
+                    items = x.values()
+                else:
+                    continue
+                if not many:
+                    for i in child[2]:
+                        res[i] = []
+                for y in items:
+                    self._walk(y, child, res, True, convert)
+                continue
+            try:
+                y = x[k]
+            except (IndexError, TypeError, KeyError):
+                continue
+            self._walk(y, child, res, many, convert)
+
+
+class ExtractionPlan(object):
+    """
+    Flat list of key-path lookups and post-processors. Build one from the _Field subclasses
+    needed by the active options when the processing object is created, then call run() on 
+    each record. This gives the same values as creating the _Field objects, but without 
+    creating any objects per record.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.fields = []
+        self.extractor = None
+        # profiler.FieldProfiler timing each field, see AcsCSV.enable_profile()
+        self.profiler = None
+
+    def add(self, field, post=None):
+        """
+        Append an output column for the _Field subclass field. The optional post callable 
+        takes the field value and returns the output value, e.g. to format a list.
+        """
+        fix = field.fix_value
+        if fix.__func__ is _Field.fix_value.__func__:
+            fix = None
+        self.steps.append((fix, post))
+        self.fields.append(field)
+        # the lookups are compiled again on the next run()
+        self.extractor = None
+        return self
+
+    def labels(self):
+        """Return the list of output column labels."""
+        return [ f.label if f.label != 'DummyKeyPathLabel' else ':'.join([str(k) for k in f.path])
+                    for f in self.fields ]
+
+    def run(self, json_record):
+        """Return the list of output values for the JSON record (as a Python dict)."""
+        if self.extractor is None:
+            self.extractor = MultiPathExtractor([ f.path for f in self.fields ]
+                    , [ f.default_value for f in self.fields ])
+            self.post_steps = [ (i, fix, post) for i, (fix, post) in enumerate(self.steps)
+                                if fix is not None or post is not None ]
+        if self.profiler is not None:
+            return self._profiled_run(json_record)
+        output_list = self.extractor.extract(json_record)
+        for i, fix, post in self.post_steps:
+            if fix is not None:
+                output_list[i] = fix(output_list[i])
+            if post is not None:
+                output_list[i] = post(output_list[i])
+        return output_list
+
+    def _profiled_run(self, json_record):
+        """run() with the time of the lookups, and of each field's fix and post, profiled."""
+        clock = time.time
+        start = clock()
+        output_list = self.extractor.extract(json_record)
+        self.profiler.add(profiler.LOOKUPS, clock() - start)
+        for i, fix, post in self.post_steps:
+            start = clock()
+            if fix is not None:
+                output_list[i] = fix(output_list[i])
+            if post is not None:
+                output_list[i] = post(output_list[i])
+            self.profiler.add(self.fields[i].__name__, clock() - start)
+        return output_list
+
+
+# compiled patterns of the characters cleanField() replaces, by delimiter
+_dirty_chars = {}
+
+def _dirty_field(delim, f):
+    """Replace newlines and delim in the stripped field f with spaces, in one pass."""
+    if len(delim) != 1:
+        # e.g. an empty delimiter, where str.replace() puts a space between characters
+        return f.replace("\n", " ").replace("\r", " ").replace(delim, " ")
+    dirty = _dirty_chars.get(delim)
+    if dirty is None:
+        dirty = _dirty_chars[delim] = re.compile(u"[\n\r]|" + re.escape(delim))
+    return dirty.sub(" ", f)
+
+
 class AcsCSV(object):
     """Base class for all delimited list objects. Basic delimited list utility functions"""
 
+    # compliance verbs that procRecordToList() handles with only the object/actor ids,
+    # so they can be recognized in the raw line, see decode_line()
+    compliance_verbs = ()
+    # the ExtractionPlan of publishers that build one from _Field subclasses
+    extraction_plan = None
+    # separator of the keys in options_keypath
+    keypath_delim = ":"
+
     def __init__(self, delim, options_keypath):
         self.delim = delim
         if delim == "":
             print >>sys.stderr, "Warning - Output has Null delimiter"
         self.rmchars = "\n\r {}".format(self.delim)
+        # a keypath, or a list of keypaths, each adding an output column
         self.options_keypath = options_keypath
+        # compiled on first use, see keyPaths()
+        self.keypath_resolver = None
+        # the keypath may point anywhere in the full compliance record 
+        self.compliance_fast_path = not options_keypath
+        # number of records that took the compliance fast path
+        self.compliance_count = 0
+        # top-level keys to decode up front, or None to decode whole records
+        self.projection = None
+        # record filters, see add_filter()
+        self.filters = []
+        # stage times and counts, see enable_stats()
+        self.stats = None
+        # time per field class, see enable_profile()
+        self.profiler = None
+        # saves the position of a run, see set_checkpoint()
+        self.checkpoint = None
+        # (byte offset, line number) of the input, see line_reader()
+        self.input_position = None
         
+    def projection_keys(self):
+        """
+        Return the top-level keys that procRecordToList() reads for the active options, or
+        None if it needs whole records. Publishers override this to support set_projection().
+        """
+        return None
+
+    def set_projection(self, enabled=True):
+        """
+        Turn projection decoding on or off. With projection on, only the top-level values 
+        listed by projection_keys() are decoded when a record is read, and the rest are 
+        decoded if and when they are used. A keypath needs the whole record, so this has 
+        no effect with options_keypath.
+        """
+        keys = None
+        if enabled and not self.options_keypath:
+            keys = self.projection_keys()
+        self.projection = None if keys is None else frozenset(keys)
+
+    def add_filter(self, record_filter):
+        """
+        Only read the records kept by record_filter, e.g. a filters.ShardFilter. Filters 
+        check the raw line first where they can, so dropped records are not decoded. 
+        """
+        self.filters.append(record_filter)
+
+    def keep_record(self, record):
+        """True if every filter keeps the (decoded) record."""
+        for f in self.filters:
+            if not f.check_record(record):
+                return False
+        return True
+
+    def drop_line(self, r):
+        """True if a filter drops the record in the raw line r without decoding it."""
+        for f in self.filters:
+            if f.check_raw(r) is False:
+                return True
+        return False
+
+    def keypaths(self):
+        """Return the list of keypaths (str) in options_keypath."""
+        if not self.options_keypath:
+            return []
+        if isinstance(self.options_keypath, basestring):
+            return [self.options_keypath]
+        return list(self.options_keypath)
+
+    def enable_stats(self, progress_interval=None, out=sys.stderr):
+        """
+        Start timing the processing stages and counting records, see stats.py. With 
+        progress_interval (seconds), progress lines are written to out as records are read.
+        Returns the stats.Stats object; get_stats() returns the summary as a dict.
+        """
+        self.stats = stats.Stats(progress_interval, out)
+        return self.stats
+
+    def get_stats(self):
+        """Return the stage times and counts as a dict, or None if stats aren't enabled."""
+        if self.stats is None:
+            return None
+        return self.stats.as_dict()
+
+    def field_classes(self):
+        """
+        Return the _Field subclasses that procRecordToList() may create for this publisher.
+        Publishers built on _Field override this to support enable_profile().
+        """
+        return []
+
+    def enable_profile(self):
+        """
+        Start profiling the time spent in each _Field subclass, see profiler.py. The field
+        classes are changed until disable_profile(). Returns the profiler.FieldProfiler.
+        """
+        self.disable_profile()
+        self.profiler = profiler.FieldProfiler()
+        self.profiler.wrap(self.field_classes())
+        if self.extraction_plan is not None:
+            self.extraction_plan.profiler = self.profiler
+        return self.profiler
+
+    def disable_profile(self):
+        """Stop profiling, and restore the field classes. The profile is kept in self.profiler."""
+        if self.profiler is not None:
+            self.profiler.unwrap()
+        if self.extraction_plan is not None:
+            self.extraction_plan.profiler = None
+
+    def set_checkpoint(self, checkpoint):
+        """
+        Save checkpoints of the run with checkpoint, a checkpoint.Checkpoint. When one is
+        due, records() saves it before reading the next line, once the records of the
+        lines before it have been yielded. Records must be written to the checkpoint's
+        sink as they are yielded, so this can't be used with parallel.py.
+        """
+        self.checkpoint = checkpoint
+
     def string_hook(self, record_string, mode_dummy):
         """
         Returns a file-like StringIO object built from the activity record in record_string.
@@ -186,39 +553,214 @@ class AcsCSV(object):
         """
         return StringIO( record_string ) 
 
-    def file_reader(self, options_filename=None, json_string=None):
+    def line_reader(self, options_filename=None, json_string=None, split=None, id_range=None
+            , start=None):
         """
-        Read arbitrary input file(s) or standard Python str. When passing file_reader() a 
-        JSON string, assign it to the json_string arg. Yields a tuple of (line number, record).
+        Read arbitrary input file(s) or standard Python str without decoding. When passing 
+        line_reader() a JSON string, assign it to the json_string arg. Yields a tuple of 
+        (line number, raw line). A single local file, plain or compressed, is read directly, 
+        see readers.py; standard input goes through fileinput. To read only part of a plain 
+        file, set split to (k, n) for the kth (1-based) of n newline-aligned byte ranges; 
+        line numbers then count from the start of the split. With id_range, (lo, hi) from
+        snowflake.id_range(), a plain file with a current offset index (see offset_index.py)
+        only yields the lines of the blocks that can hold ids lo <= id < hi, and the
+        compliance messages of the other blocks, as without the index. Other lines of the
+        blocks read are still yielded, so use a filters.TimeWindowFilter to keep only the
+        window. While lines are read, self.input_position is the (byte offset, line number)
+        of the start of the line last yielded, then of the end of the input; offsets in
+        compressed files count decompressed bytes. To resume reading a single plain or compressed file from such
+        a position, e.g. from a checkpoint, set start to it.
         """
+        offset = 0
         line_number = 0
-        if json_string is not None: 
-            hook = self.string_hook 
-            options_filename = json_string 
+        if start is not None:
+            if (split is not None or json_string is not None
+                    or not (readers.is_plain_file(options_filename)
+                        or readers.is_compressed_file(options_filename))):
+                raise ValueError("Resuming needs a single plain or compressed input file")
+            offset, line_number = start
+        index = None
+        if id_range is not None and split is None and readers.is_plain_file(options_filename):
+            index = offset_index.load_current(options_filename)
+        if split is not None:
+            if json_string is not None or not readers.is_plain_file(options_filename):
+                raise ValueError("Splits need a plain input file")
+            lines = readers.split_lines(options_filename, *split)
+        elif json_string is not None: 
+            lines = fileinput.FileInput(json_string, openhook=self.string_hook)
+        elif readers.is_plain_file(options_filename):
+            if offset > 0:
+                lines = readers.range_lines(options_filename, offset)
+            else:
+                lines = readers.file_lines(options_filename)
+        elif readers.is_compressed_file(options_filename):
+            lines = readers.compressed_lines(options_filename, skip=offset)
         else:
-            hook = fileinput.hook_compressed
-        for r in fileinput.FileInput(options_filename, openhook=hook):  
-            line_number += 1
-            try:
-                recs = [json.loads(r.strip())]
-            except ValueError:
-                try:
-                    # maybe a missing line feed?
-                    recs = [json.loads(x) for x in r.strip().replace("}{", "}GNIP_SPLIT{")
-                        .split("GNIP_SPLIT")]
-                except ValueError:
-                    sys.stderr.write("Invalid JSON record (%d) %s, skipping\n"
-                        %(line_number, r.strip()))
-                    continue
-            for record in recs:
-                if len(record) == 0:
+            lines = fileinput.FileInput(options_filename, openhook=fileinput.hook_compressed)
+        if index is not None:
+            first, end = index.byte_range(*id_range)
+            max_len = rawscan.COMPLIANCE_MAX_LEN
+            verb_search = rawscan.verbRE.search
+            for r in lines:
+                # the blocks outside the window only hold records with ids outside it,
+                # blank lines and short compliance messages, which apply to activities
+                # of any time
+                if (offset < first or offset >= end) and not (len(r) <= max_len and verb_search(r)):
+                    line_number += 1
+                    offset += len(r)
                     continue
-                # hack: let the old source modules still have a self.cnt for error msgs
-                self.cnt = line_number
-                yield line_number, record
+                self.input_position = (offset, line_number)
+                line_number += 1
+                offset += len(r)
+                yield line_number, r
+        else:
+            for r in lines:  
+                self.input_position = (offset, line_number)
+                line_number += 1
+                offset += len(r)
+                yield line_number, r
+        self.input_position = (offset, line_number)
+
+    def decode_line(self, r, line_number):
+        """
+        Decode one raw input line holding a single record, and return the record in a list. 
+        Return None if the line isn't one complete record, see records(). Short compliance 
+        messages are returned as a minimal record built from the raw line, without decoding 
+        the JSON. With projection on (see set_projection()), only part of the record is decoded.
+        """
+        if self.compliance_fast_path and len(r) <= rawscan.COMPLIANCE_MAX_LEN:
+            rec = rawscan.compliance_record(r, self.compliance_verbs)
+            if rec is not None:
+                self.compliance_count += 1
+                if self.stats is not None:
+                    self.stats.count("compliance")
+                return [rec]
+        if self.projection is not None:
+            rec = rawscan.project_record(r, self.projection)
+            if rec is not None:
+                return [rec]
+        try:
+            # the decoder skips the surrounding whitespace, so don't copy the line to strip it
+            return [json.loads(r)]
+        except ValueError:
+            return None
+
+    def records(self, lines):
+        """
+        Take an iterable of (line number, raw line) tuples, e.g. from line_reader(). Yields 
+        a tuple of (line number, record) for each non-empty record. Lines holding one record 
+        are decoded on their own. Anything else, e.g. several records on one line, or a 
+        record over many lines, goes through a JSONStream; the line number is then the line 
+        the record starts on. Invalid records are reported to stderr and skipped, as are 
+        records dropped by the filters, see add_filter().
+        """
+        if self.stats is not None:
+            return self._timed_records(lines)
+        return self._records(lines)
+
+    def _records(self, lines):
+        for line_number, record in self._decode_lines(lines):
+            if len(record) == 0:
+                continue
+            if self.filters and not self.keep_record(record):
+                if self.stats is not None:
+                    self.stats.count("filtered")
+                continue
+            # hack: let the old source modules still have a self.cnt for error msgs
+            self.cnt = line_number
+            yield line_number, record
+
+    def _timed_records(self, lines):
+        """records() with the time spent reading and decoding added to self.stats."""
+        st = self.stats
+        clock = time.time
+        it = self._records(st.lines(lines))
+        while True:
+            read = st.seconds["read"]
+            start = clock()
+            try:
+                x = it.next()
+            except StopIteration:
+                break
+            # reading is timed by st.lines()
+            st.add("decode", clock() - start - (st.seconds["read"] - read))
+            st.record()
+            yield x
+
+    def _decode_lines(self, lines):
+        stream = jsonstream.JSONStream()
+        checkpoint = self.checkpoint
+        try:
+            for line_number, r in lines:
+                # the records of the lines before this one have all been yielded
+                if checkpoint is not None and checkpoint.due and not stream.pending():
+                    checkpoint.save(*self.input_position)
+                recs = None
+                if not stream.pending():
+                    if self.filters and self.drop_line(r):
+                        if self.stats is not None:
+                            self.stats.count("filtered")
+                        continue
+                    recs = self.decode_line(r, line_number)
+                if recs is None:
+                    for x in stream.feed(r, line_number):
+                        yield x
+                else:
+                    for record in recs:
+                        yield line_number, record
+            for x in stream.close():
+                yield x
+        finally:
+            if self.stats is not None:
+                self.stats.count("errors", stream.errors)
+
+    def file_reader(self, options_filename=None, json_string=None, split=None, id_range=None
+            , start=None):
+        """
+        Read arbitrary input file(s) or standard Python str. When passing file_reader() a 
+        JSON string, assign it to the json_string arg. Yields a tuple of (line number, record).
+        See line_reader() for split, id_range and start.
+        """
+        return self.records(self.line_reader(options_filename, json_string, split, id_range
+            , start))
 
     def cleanField(self,f):
         """Clean fields of new lines and delmiter."""
+        t = type(f)
+        if t is unicode or t is str:
+            f = f.strip()
+            # most fields have nothing to replace
+            if "\n" in f or "\r" in f or self.delim in f:
+                return _dirty_field(self.delim, f)
+            return f
+        elif t is int or t is long or t is float:
+            return str(f)
+        elif f is None:
+            return INTERNAL_EMPTY_FIELD
+        return self._cleanOther(f)
+
+    def cleanRow(self, row):
+        """Return the list of cleanField() values of the fields in row."""
+        delim = self.delim
+        res = []
+        append = res.append
+        for f in row:
+            t = type(f)
+            if t is unicode or t is str:
+                f = f.strip()
+                if "\n" in f or "\r" in f or delim in f:
+                    f = _dirty_field(delim, f)
+                append(f)
+            elif t is int or t is long or t is float:
+                append(str(f))
+            elif f is None:
+                append(INTERNAL_EMPTY_FIELD)
+            else:
+                append(self._cleanOther(f))
+        return res
+
+    def _cleanOther(self, f):
+        """cleanField() for any other type, e.g. bool or str subclasses."""
         res = INTERNAL_EMPTY_FIELD
         try:
             res = f.strip(
@@ -236,25 +778,37 @@ class AcsCSV(object):
                 pass
         return res
 
-    #Experimental 
-    #@jit
     def buildListString(self,l):
         """Generic list builder returns a string representation of list"""
         # unicode output of list (without u's)
-        res = '['
+        try:
+            # fast path for lists of strings
+            return "['" + "','".join(l) + "']" if len(l) > 0 else "[]"
+        except TypeError:
+            pass
+        parts = []
+        self.writeListString(l, parts.append)
+        return "".join(parts)
+
+    def writeListString(self, l, write):
+        """
+        Write the buildListString() representation of l in pieces with write, e.g. the
+        append() of a list of output parts, without building the whole string.
+        """
+        write("[")
+        sep = "'"
         for r in l:
+            write(sep)
+            sep = ",'"
             # handle the various types of lists we might see
             if isinstance(r, list):
-                res += "'" + self.buildListString(r) + "',"
-            #elif isinstance(r, str):
+                self.writeListString(r, write)
             elif isinstance(r, str) or isinstance(r, unicode):
-                res += "'" + r + "',"
+                write(r)
             else:
-                res += "'" + str(r) + "',"
-        if res.endswith(','):
-            res = res[:-1]
-        res += ']'
-        return res
+                write(str(r))
+            write("'")
+        write("]")
 
     #Experimental 
     #@jit
@@ -279,14 +833,86 @@ class AcsCSV(object):
         """Wrapper for the core activity parsing function."""
         source_list = self.procRecordToList(x)
         if self.options_keypath:
-            source_list.append(self.keyPath(x))
+            source_list.extend(self.keyPaths(x))
         # ensure no pipes, newlines, etc
-        return [ self.cleanField(x) for x in source_list ]
+        return self.cleanRow(source_list)
+
 
+    def column_names(self):
+        """
+        Return the list of output column names, or None if the publisher doesn't name its 
+        columns. Publishers with an ExtractionPlan use its labels; keypaths are named by path.
+        """
+        if self.extraction_plan is None:
+            return None
+        return self.extraction_plan.labels() + self.keypaths()
+
+    def batch_rows(self, records):
+        """
+        Yield (position in records, procRecordToList() list and keypath values) of each
+        activity in records. Compliance and system messages, which have other columns, are
+        left out; records that can't be read give the error row of procRecordToList(),
+        starting with GNIPERROR.
+        """
+        proc = self.procRecordToList
+        compliance_verbs = self.compliance_verbs
+        for i, x in enumerate(records):
+            if compliance_verbs and x.get("verb") in compliance_verbs:
+                continue
+            # for the error messages of some publishers
+            self.cnt = i + 1
+            row = proc(x)
+            if not row or (isinstance(row[0], basestring) and row[0].startswith(gnipRemove)):
+                continue
+            if isinstance(row[0], basestring) and row[0].startswith(gnipError):
+                yield i, row
+                continue
+            if self.options_keypath:
+                row.extend(self.keyPaths(x, raw=True))
+            yield i, row
+
+    def extract_batch(self, records, index=None):
+        """
+        Take a list of records (Python dicts), e.g. from file_reader(), and return an 
+        OrderedDict of output columns, see columns.typed_column(): arrays for numbers, e.g. 
+        followersCount, and lists for everything else, with None for missing values. Values 
+        aren't cleaned of newlines or delimiters. Columns are named by column_names(), or by 
+        position. Compliance and system messages, and error rows (see batch_rows()), are
+        left out. With index, a column name, the first column holds the position in records
+        of the record of each row, so the records left out can be accounted for.
+        """
+        names = self.column_names()
+        rows = [ (i, r) for i, r in self.batch_rows(records)
+                    if not (r and isinstance(r[0], basestring) and r[0].startswith(gnipError)) ]
+        if names is None:
+            names = range(max([ len(r) for i, r in rows ] + [0]))
+        # rows of other lengths, e.g. error rows of some publishers, are left out
+        rows = [ (i, r) for i, r in rows if len(r) == len(names) ]
+        res = collections.OrderedDict()
+        if index is not None:
+            res[index] = columns.typed_column([ i for i, r in rows ])
+        missing = (INTERNAL_EMPTY_FIELD, KEYPATH_EMPTY)
+        for j, name in enumerate(columns.unique_names(names)):
+            res[name] = columns.typed_column([ r[j] for i, r in rows ], missing)
+        return res
 
     def procRecord(self, x, emptyField="None"):
+        if self.stats is not None:
+            return self._timed_procRecord(x, emptyField)
         return self.asString(self.get_source_list(x), emptyField)
 
+    def _timed_procRecord(self, x, emptyField):
+        """procRecord() with the extract and clean times added to self.stats."""
+        start = time.time()
+        source_list = self.procRecordToList(x)
+        if self.options_keypath:
+            source_list.extend(self.keyPaths(x))
+        cleaned = time.time()
+        self.stats.add("extract", cleaned - start)
+        res = self.asString(self.cleanRow(source_list), emptyField)
+        self.stats.add("clean", time.time() - cleaned)
+        return res
+
 
     def asGeoJSON(self, x):
         """Get results as GeoJSON representation."""
@@ -305,27 +931,21 @@ class AcsCSV(object):
                 , "properties": { "id": record_list[0] } 
                 }
     
-    def keyPath(self,d):
-        """Get a generic key path specified at run time."""
-        #key_list = self.options_keypath.split(":")
-        delim = ":"
-        #print >> sys.stderr, "self.__class__ " + str(self.__class__)
-        if self.__class__.__name__ == "NGacsCSV":
-            delim = ","
-        key_stack = self.options_keypath.split(delim)
-        #print >> sys.stderr, "key_stack " + str(key_stack)
-        x = d
-        while len(key_stack) > 0:
-            try:
-                k = key_stack.pop(0)
-                try:
-                    idx = int(k)
-                except ValueError:
-                    # keys are ascii strings
-                    idx = str(k)
-                x = x[idx]
-            except (IndexError, TypeError, KeyError) as e:
-                #sys.stderr.write("Keypath error at %s\n"%k)
-                return "PATH_EMPTY"
-        return unicode(x)
+    def keyPaths(self, d, raw=False):
+        """
+        Return the list of values of the keypaths specified at run time, see KeyPathResolver.
+        With raw, the values are returned as they are in d, e.g. for extract_batch().
+        """
+        if self.keypath_resolver is None:
+            self.keypath_resolver = KeyPathResolver(self.keypaths(), self.keypath_delim)
+        if raw:
+            return self.keypath_resolver.resolve(d, raw=True)
+        res = self.keypath_resolver.resolve(d)
+        for i, x in enumerate(res):
+            if type(x) is list:
+                res[i] = self.buildListString(x)
+        return res
 
+    def keyPath(self,d):
+        """Get a generic key path specified at run time (the first one, if there are several)."""
+        return self.keyPaths(d)[0]
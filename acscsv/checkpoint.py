@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import sys
+import stat
+import time
+# use fastest option available
+try:
+    import ujson as json
+except ImportError:
+    try:
+        import json
+    except ImportError:
+        import simplejson as json
+
+"""
+Checkpoints of a long run, to resume it after it stops. A checkpoint holds the input
+file, the byte offset and line number of the next line to read, and the bytes and rows
+of output written before it. It is only saved at the start of a line when no record is
+partly read, right after the output is flushed, so the output up to output_bytes is
+exactly the output of the input up to offset. Offsets of compressed files count
+decompressed bytes, see AcsCSV.line_reader().
+"""
+
+# seconds between checkpoints
+CHECKPOINT_INTERVAL = 5.0
+
+class Checkpoint(object):
+    """
+    Save the position of a run reading input_name and writing to sink, an
+    output.OutputSink, to the file path. Start the run with begin(). After a flush of the
+    sink, once interval seconds have passed since the last save, due is set, and the
+    reader calls save() at the next line start (see AcsCSV.set_checkpoint()).
+    """
+
+    def __init__(self, path, input_name, sink, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.input_name = os.path.abspath(input_name)
+        self.sink = sink
+        self.interval = interval
+        # output of the runs before this one
+        self.base_bytes = 0
+        self.base_rows = 0
+        self.due = False
+        self.last_save = time.time()
+        sink.flush_callbacks.append(self.flushed)
+
+    def load(self):
+        """
+        Return the saved state, a dict, or None if there is no checkpoint file. Raise
+        ValueError if the checkpoint is for another input file, or not a checkpoint.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            try:
+                state = json.loads(f.read())
+            except ValueError:
+                state = None
+        if not isinstance(state, dict) or "offset" not in state:
+            raise ValueError("%s is not a gnacs checkpoint"%self.path)
+        if state["input"] != self.input_name:
+            raise ValueError("%s is a checkpoint of %s"%(self.path, state["input"]))
+        return state
+
+    def begin(self, stream):
+        """
+        Load the checkpoint, and prepare stream, the output file of sink, to continue the
+        output. Return the (byte offset, line number) to resume reading from (see
+        AcsCSV.line_reader()), or None for a new run. A file is cut back to the bytes of
+        the checkpoint, dropping any rows written after it, and written from there; raise
+        ValueError if it is shorter, e.g. when it was opened with > instead of >>. Output
+        to a pipe can't be cut back, so it may repeat rows written after the checkpoint.
+        A new run saves a checkpoint at the start of the input, so a run that stops before
+        its next checkpoint is cut back too.
+        """
+        state = self.load()
+        fd = stream.fileno()
+        is_file = stat.S_ISREG(os.fstat(fd).st_mode)
+        stream.flush()
+        if state is None:
+            if is_file:
+                self.base_bytes = os.fstat(fd).st_size
+            self.save(0, 0)
+            return None
+        self.base_bytes = state["output_bytes"]
+        self.base_rows = state["output_rows"]
+        if not is_file:
+            print >>sys.stderr, "Warning - output isn't a file, rows written after the checkpoint may be repeated"
+        else:
+            size = os.fstat(fd).st_size
+            if size < self.base_bytes:
+                raise ValueError("the output has %d bytes, less than the %d bytes of the checkpoint"
+                        %(size, self.base_bytes))
+            os.ftruncate(fd, self.base_bytes)
+            stream.seek(0, os.SEEK_END)
+        return (state["offset"], state["lines"])
+
+    def flushed(self, rows, bytes):
+        """Flush callback of the sink."""
+        if time.time() - self.last_save >= self.interval:
+            self.due = True
+
+    def save(self, offset, lines, complete=False):
+        """
+        Flush the output and save the checkpoint: the next line to read starts at byte
+        offset, after lines lines. complete marks the end of the input.
+        """
+        self.due = False
+        if not self.sink.flush():
+            # the reader of the output is gone, so the last checkpoint stays
+            return
+        state = {"input": self.input_name
+                , "offset": offset
+                , "lines": lines
+                , "output_bytes": self.base_bytes + self.sink.bytes_written
+                , "output_rows": self.base_rows + self.sink.rows_written
+                , "complete": complete
+                , "time": time.time()
+                }
+        # the old checkpoint stays whole until the new one replaces it
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(state))
+        os.rename(tmp, self.path)
+        self.last_save = time.time()
+        self.due = False
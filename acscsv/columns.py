@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Typed columns for AcsCSV.extract_batch(). Columns of numbers are NumPy arrays (or, without
+NumPy, array.array), so they go straight into NumPy or pandas; other columns are lists.
+"""
+
+NAN = float("nan")
+
+def typed_column(values, missing=()):
+    """
+    Return the list of values as a column. Integers become an int64 array; floats, or
+    integers with missing values, a float64 array with NaN for the missing values. Any
+    other column is a list, with None for the missing values. missing is a collection of
+    the values that mark a missing value, e.g. INTERNAL_EMPTY_FIELD.
+    """
+    kind = None
+    has_missing = False
+    for x in values:
+        t = type(x)
+        if t is int or t is long:
+            if kind is None:
+                kind = int
+        elif t is float:
+            kind = float
+        elif x is None or x in missing:
+            has_missing = True
+        else:
+            kind = list
+            break
+    if kind is None or kind is list:
+        return [ None if x is None or x in missing else x for x in values ]
+    if kind is int and not has_missing:
+        try:
+            return _array("l", "int64", values)
+        except OverflowError:
+            pass
+    return _array("d", "float64", [ NAN if x is None or x in missing else x for x in values ])
+
+def _array(typecode, dtype, values):
+    if numpy is not None:
+        return numpy.array(values, dtype=dtype)
+    return array.array(typecode, values)
+
+def unique_names(names):
+    """Return names with repeats made unique as pandas does, e.g. [a, a] -> [a, a.1]."""
+    res = []
+    seen = {}
+    for name in names:
+        n = seen.get(name, 0)
+        seen[name] = n + 1
+        res.append(name if n == 0 else "{}.{}".format(name, n))
+    return res
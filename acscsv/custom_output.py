@@ -6,6 +6,7 @@ __license__="Simplified BSD"
 import sys
 import json
 import acscsv
+import output
 
 # for custom twitter output, import both the fields module and the code module
 from twitter_acs_fields import *
@@ -23,36 +24,36 @@ class CustomCSV( twitter_acs.TwacsCSV ):
     Test class for experimenting with new output combinations. This class should inherit
     from the appropriate module.class in the core library. Compliance and invalid records 
     are handled by the parent class' procRecord() method. This class should only define a 
-    new get_output_list() method which overrides the parent method and determines the 
-    custom output. 
+    new build_extraction_plan() method which overrides the parent method and determines the 
+    custom output. (Overriding get_output_list() with Field_ objects still works, but is 
+    slower.)
     """       
     
-    def get_output_list(self, d):
+    def build_extraction_plan(self):
         """
-        Use this method to overwrite the output method in the parent class. Append values from 
-        desired payload fields to the output list, which is returned at the end of this method. 
-        Non-str values (ints, lists, etc), must be cast as str or will return 'None'. 
-        
-        Take a JSON Activity Streams payload as a Python dictionary. Extract the fields 
-        appended to output_list and then return output_list. 
+        Use this method to overwrite the output plan in the parent class. Add the extractor
+        classes for the desired payload fields to the plan, which is returned at the end of 
+        this method. The plan looks up the key-paths of all fields together, once per record. 
+        Non-str values (ints, lists, etc), must be cast as str or will return 'None', so pass
+        str (or any other function of the value) as the second argument to add(). 
         """
-        output_list = [] 
+        plan = acscsv.ExtractionPlan()
 
         # twitter country code
-        output_list.append( Field_location_twitter_country_code(d).value )
+        plan.add( Field_location_twitter_country_code )
 
         # matching rules -- note the str cast; value is a list 
-        output_list.append( str(Field_gnip_rules(d).value) )
+        plan.add( Field_gnip_rules, str )
 
         # username 
-        output_list.append( Field_actor_preferredusername(d).value )
+        plan.add( Field_actor_preferredusername )
 
         # geo-tag coords (returns a list, cast to str)
-        output_list.append( str(Field_geo_coordinates(d).value) )
+        plan.add( Field_geo_coordinates, str )
 
 
-        # done building output list 
-        return output_list 
+        # done building output plan 
+        return plan
 
 
 
@@ -67,7 +68,10 @@ if __name__ == "__main__":
     #   fields to be printed in the method above 
     processing_obj = CustomCSV("|", None, *[True]*7) 
 
+    sink = output.OutputSink(sys.stdout)
     for line_number, record in processing_obj.file_reader(): 
-        # note: this doesn't handle broken pipe errors  
-        sys.stdout.write( u"{}\n".format( processing_obj.procRecord(record, emptyField="None") ))
+        # stop on broken pipe errors, e.g. when output is piped to 'head'
+        if not sink.write( u"{}\n".format( processing_obj.procRecord(record, emptyField="None") )):
+            break
+    sink.close()
 
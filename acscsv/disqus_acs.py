@@ -5,6 +5,8 @@ __license__="Simplified BSD"
 import sys
 import acscsv
 class DiacsCSV(acscsv.AcsCSV):
+    compliance_verbs = ("delete",)
+
     def __init__(self, delim, options_keypath, options_user, options_rules, options_lang, options_struct, options_status):
         super(DiacsCSV, self).__init__(delim,options_keypath)
         self.options_user = options_user
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import time
+import zlib
+import calendar
+import rawscan
+import snowflake
+
+"""
+Record filters for AcsCSV.add_filter(). A filter has two checks:
+    check_raw(line) looks at the raw line before it is decoded, and returns False if the
+        record can be dropped, or True or None (unknown) otherwise.
+    check_record(record) takes the decoded record, and returns True to keep it.
+check_raw() must never return False for a record that check_record() keeps.
+"""
+
+# time formats of --since and --until
+TIME_FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H", "%Y-%m-%d"]
+
+def parse_time(value):
+    """
+    Parse a UTC time such as 2013-07-01T22:00:00, 2013-07-01T22:00 or 2013-07-01 (with or
+    without a trailing Z) into seconds since the epoch. Raise ValueError if the time is
+    not in one of these forms.
+    """
+    value = value.strip().rstrip("Z")
+    for fmt in TIME_FORMATS:
+        try:
+            return calendar.timegm(time.strptime(value, fmt))
+        except ValueError:
+            pass
+    raise ValueError("expected a time such as 2013-07-01T22:00:00, got %s"%value)
+
+def record_id(record):
+    """
+    Return the id (str) that identifies the activity in record: the top-level id, or the
+    object or actor id of compliance messages. Return None if there is none, e.g. for
+    system messages.
+    """
+    for path in [("id",), ("object", "id"), ("actor", "id")]:
+        x = record
+        for k in path:
+            if not isinstance(x, dict) or k not in x:
+                x = None
+                break
+            x = x[k]
+        if x is not None:
+            return unicode(x).encode("utf-8")
+    return None
+
+class ShardFilter(object):
+    """
+    Keep the records in shard k (1-based) of n. Shards are picked by a hash of the last
+    part of the activity id, e.g. the snowflake in tag:search.twitter.com,2005:1234, so
+    a delete goes to the same shard as its activity. The hash is the same on every
+    machine, so n processes reading the same input each get a different 1/n of the
+    records. Records without an id are in shard 1.
+    """
+    def __init__(self, k, n):
+        self.k = k
+        self.n = n
+
+    def shard(self, activity_id):
+        """Return the shard (1-based) of the activity id (str)."""
+        return (zlib.crc32(activity_id.rsplit(":", 1)[-1]) & 0xffffffff) % self.n + 1
+
+    def check_raw(self, line):
+        activity_id = rawscan.leading_id(line)
+        if activity_id is None:
+            return None
+        return self.shard(activity_id) == self.k
+
+    def check_record(self, record):
+        activity_id = record_id(record)
+        if activity_id is None:
+            return self.k == 1
+        return self.shard(activity_id) == self.k
+
+class SnowflakeFilter(object):
+    """Base of the filters that read the time or sample set in the snowflake of an id."""
+    def __init__(self):
+        # the range of ids that Snowflake decodes
+        self.min_valid, self.max_valid = snowflake.valid_range()
+
+    def snowflake_id(self, activity_id):
+        """Return the snowflake (int) at the end of the activity id (str), or None."""
+        x = activity_id.rsplit(":", 1)[-1]
+        if not x.isdigit():
+            return None
+        x = int(x)
+        if x < self.min_valid or x >= self.max_valid:
+            return None
+        return x
+
+class TimeWindowFilter(SnowflakeFilter):
+    """
+    Keep the activities posted at or after since and before until (seconds since the
+    epoch; either may be None). The time of an activity is in its snowflake id, so the raw
+    check compares the id with the ids at the bounds, without decoding the record. Ids
+    that aren't valid snowflakes (see snowflake.Snowflake), e.g. pre-snowflake Twitter
+    ids and the ids of other publishers, fall back to the postedTime of the decoded record.
+    Compliance messages apply to activities of any time, so they are always kept, as are
+    records with neither, e.g. system messages.
+    """
+    def __init__(self, since=None, until=None):
+        SnowflakeFilter.__init__(self)
+        self.since = since
+        self.until = until
+        # ids at the bounds, and the bounds as postedTime strings (UTC, to the second)
+        self.lo, self.hi = snowflake.id_range(since, until)
+        self.since_str = self.until_str = None
+        if since is not None:
+            self.since_str = time.strftime(snowflake.FMT, time.gmtime(since))
+        if until is not None:
+            self.until_str = time.strftime(snowflake.FMT, time.gmtime(until))
+
+    def check_id(self, x):
+        return (self.lo is None or x >= self.lo) and (self.hi is None or x < self.hi)
+
+    def check_raw(self, line):
+        if len(line) <= rawscan.COMPLIANCE_MAX_LEN and rawscan.verbRE.search(line):
+            return None
+        activity_id = rawscan.leading_id(line)
+        if activity_id is None:
+            return None
+        x = self.snowflake_id(activity_id)
+        if x is None:
+            return None
+        return self.check_id(x)
+
+    def check_record(self, record):
+        if not isinstance(record, dict) or record.get("verb") in ("delete", "scrub_geo"):
+            return True
+        activity_id = record.get("id")
+        if activity_id is not None:
+            x = self.snowflake_id(unicode(activity_id).encode("utf-8"))
+            if x is not None:
+                return self.check_id(x)
+        posted = record.get("postedTime", record.get("created_at"))
+        if not isinstance(posted, basestring):
+            return True
+        # the first 19 characters of the UTC time compare in time order
+        posted = posted[:19]
+        return ((self.since_str is None or posted >= self.since_str)
+                    and (self.until_str is None or posted < self.until_str))
+
+class SampleFilter(SnowflakeFilter):
+    """
+    Keep the records whose sample set (see snowflake.Snowflake) is below percent, the same
+    sample every time, e.g. percent=1 keeps sample set 0, Twitter's 1% sample. The raw
+    check reads the sample set from the leading snowflake id without decoding the record.
+    Compliance messages are sampled by the id of their activity, so a delete is kept with
+    its activity. Records whose id isn't a valid snowflake fall back to a hash of the id;
+    records without an id, e.g. system messages, are kept.
+    """
+    def __init__(self, percent):
+        SnowflakeFilter.__init__(self)
+        self.percent = percent
+
+    def sample_set(self, activity_id):
+        """Return the sample set (0-99) of the activity id (str)."""
+        x = self.snowflake_id(activity_id)
+        if x is None:
+            return (zlib.crc32(activity_id.rsplit(":", 1)[-1]) & 0xffffffff) % 100
+        return (x >> snowflake.SF_TIME_SHIFT) % 100
+
+    def check_raw(self, line):
+        activity_id = rawscan.leading_id(line)
+        if activity_id is None:
+            return None
+        return self.sample_set(activity_id) < self.percent
+
+    def check_record(self, record):
+        activity_id = record_id(record)
+        if activity_id is None:
+            return True
+        return self.sample_set(activity_id) < self.percent
@@ -6,6 +6,8 @@ import sys
 import acscsv
 
 class FsqacsCSV(acscsv.AcsCSV):
+    compliance_verbs = ("delete", "scrub_geo")
+
     def __init__(self, delim, options_keypath, options_geo, options_user, options_rules):
         super(FsqacsCSV, self).__init__(delim,options_keypath)
         self.options_geo = options_geo 
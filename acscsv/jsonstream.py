@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import re
+import sys
+# ujson has no raw_decode()
+import json as json_stream
+
+"""
+Incremental decoding of JSON records that don't come one per line, e.g. records run
+together on one line, or pretty-printed records (such as the output of gnacs -p) spread
+over many lines.
+"""
+
+# pending text longer than this is reported as invalid instead of waiting for more lines
+MAX_RECORD_LEN = 1 << 24
+
+whitespaceRE = re.compile(r'\s*')
+
+class JSONStream(object):
+    """
+    Buffer raw lines and decode the JSON records in them, however the records are split
+    across lines. Decoding is only tried once the braces in the pending text balance, so
+    a pretty-printed record isn't decoded again for every line. A line starting with "{"
+    in the first column starts a new record, so the pending text is decoded (or reported)
+    then, whatever its braces, and one bad record doesn't swallow the rest of the input.
+    Invalid text is reported to stderr with the line number it started on.
+    """
+
+    def __init__(self):
+        self.decoder = json_stream.JSONDecoder()
+        self.buf = ""
+        self.start_line = None
+        # number of invalid records reported
+        self.errors = 0
+
+    def pending(self):
+        """True if part of a record is waiting for more lines."""
+        return len(self.buf) > 0
+
+    def feed(self, r, line_number):
+        """
+        Add the raw line r. Return a list of (line number, record) tuples for the records
+        completed by this line, where the line number is the line each record starts on.
+        """
+        res = []
+        if self.buf and r.startswith("{"):
+            self._drain(self.buf, self.start_line, res, final=True)
+            self._drain(r, line_number, res)
+        elif self.buf:
+            self._drain(self.buf + r, self.start_line, res)
+        else:
+            self._drain(r, line_number, res)
+        return res
+
+    def close(self):
+        """
+        Return a list of (line number, record) tuples for the records still pending at the
+        end of the input, and report anything left over.
+        """
+        res = []
+        if self.buf:
+            self._drain(self.buf, self.start_line, res, final=True)
+        return res
+
+    def _drain(self, text, line_number, res, final=False):
+        """
+        Decode the records in text and append them to res. An incomplete record at the end
+        is kept in the buffer, unless final is True, when it is reported.
+        """
+        self.buf = ""
+        self.start_line = None
+        pos = 0
+        while True:
+            end = whitespaceRE.match(text, pos).end()
+            line_number += text.count("\n", pos, end)
+            pos = end
+            if pos == len(text):
+                return
+            if text[pos] != "{":
+                # not the start of a record; skip the rest of the line
+                end = text.find("\n", pos)
+                end = len(text) if end < 0 else end
+                self._invalid(text[pos:end], line_number)
+                pos = end
+                continue
+            try:
+                if not final and text.count("{", pos) > text.count("}", pos):
+                    raise ValueError("Incomplete record")
+                record, end = self.decoder.raw_decode(text, pos)
+            except ValueError:
+                if final or len(text) - pos > MAX_RECORD_LEN:
+                    self._invalid(text[pos:], line_number)
+                else:
+                    self.buf = text[pos:]
+                    self.start_line = line_number
+                return
+            res.append((line_number, record))
+            line_number += text.count("\n", pos, end)
+            pos = end
+
+    def _invalid(self, text, line_number):
+        self.errors += 1
+        text = text.strip().split("\n")[0]
+        sys.stderr.write("Invalid JSON record (%d) %s, skipping\n"%(line_number, text))
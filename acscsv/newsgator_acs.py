@@ -6,6 +6,10 @@ import sys
 import acscsv
 
 class NGacsCSV(acscsv.AcsCSV):
+    compliance_verbs = ("delete",)
+    # newsgator keys hold ":", e.g. ng:state
+    keypath_delim = ","
+
     def __init__(self, delim, options_keypath, options_urls, options_user):
         super(NGacsCSV, self).__init__(delim,options_keypath)
         self.options_urls = options_urls
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import sys
+import rawscan
+import readers
+import filters
+# use fastest option available
+try:
+    import ujson as json
+except ImportError:
+    try:
+        import json
+    except ImportError:
+        import simplejson as json
+
+"""
+Sparse offset index of a plain input file, kept in a sidecar file next to it (e.g.
+hour.json.idx). The file is cut into blocks of about INTERVAL lines, each starting at a
+record, and the index holds the byte offset and the smallest and largest snowflake id of
+each block. A reader of an id range, e.g. a time window (see snowflake.id_range()), then
+only decodes the blocks that can hold an id in the range, and the compliance messages of
+the other blocks. The smallest and largest ids, not the first, make this exact for nearly
+sorted files too. A block with a record that may be an activity without a valid snowflake
+id at its start, e.g. a pre-snowflake Twitter id, has no ids and is never skipped, as a
+filters.TimeWindowFilter checks such records by their postedTime. The index records the
+size and modification time of the file, and an index that doesn't match the file is never
+used. Build an index with
+
+    python offset_index.py hour.json
+"""
+
+INDEX_SUFFIX = ".idx"
+# lines per block
+INTERVAL = 1000
+# indexes of older versions are rebuilt
+VERSION = 2
+
+def index_path(filename):
+    """Return the name of the sidecar index of filename."""
+    return filename + INDEX_SUFFIX
+
+def _block(block, unknown):
+    """Return the finished block, without ids if it may hold records without one."""
+    if unknown:
+        return [block[0], None, None]
+    return block
+
+def _file_id(filename):
+    # microseconds, as floats may not survive the JSON encoder
+    st = os.stat(filename)
+    return st.st_size, int(round(st.st_mtime * 1e6))
+
+class OffsetIndex(object):
+    """
+    Blocks of a file, a list of [byte offset, smallest id, largest id], in file order.
+    The ids of a block without any snowflake ids, or with a record that may be an activity
+    without one, are None.
+    """
+
+    def __init__(self, size, mtime, interval, blocks):
+        self.size = size
+        self.mtime = mtime
+        self.interval = interval
+        self.blocks = blocks
+
+    @classmethod
+    def build(cls, filename, interval=INTERVAL):
+        """Scan the plain file filename and return its index."""
+        size, mtime = _file_id(filename)
+        snowflake_id = filters.SnowflakeFilter().snowflake_id
+        blocks = []
+        block = [0, None, None]
+        # the block has a record that may be an activity without a snowflake id
+        unknown = False
+        lines = 0
+        pos = 0
+        with open(filename, "rb", readers.READ_BUFFER) as f:
+            for r in f:
+                activity_id = rawscan.leading_id(r)
+                x = None
+                if activity_id is not None:
+                    x = snowflake_id(activity_id)
+                    # blocks start at a record
+                    if lines >= interval:
+                        blocks.append(_block(block, unknown))
+                        block = [pos, None, None]
+                        unknown = False
+                        lines = 0
+                if x is None:
+                    if r.strip() and not (len(r) <= rawscan.COMPLIANCE_MAX_LEN
+                            and rawscan.verbRE.search(r)):
+                        unknown = True
+                else:
+                    if block[1] is None or x < block[1]:
+                        block[1] = x
+                    if block[2] is None or x > block[2]:
+                        block[2] = x
+                lines += 1
+                pos += len(r)
+        blocks.append(_block(block, unknown))
+        if _file_id(filename) != (size, mtime):
+            raise IOError("%s changed while it was indexed"%filename)
+        return cls(size, mtime, interval, blocks)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(json.dumps({"version": VERSION, "size": self.size, "mtime": self.mtime
+                , "interval": self.interval, "blocks": self.blocks}))
+
+    @classmethod
+    def load(cls, path):
+        """Read an index saved by save(). Raise ValueError if it isn't one."""
+        with open(path, "rb") as f:
+            d = json.loads(f.read())
+        if not isinstance(d, dict) or d.get("version") != VERSION:
+            raise ValueError("%s is not a gnacs offset index"%path)
+        return cls(d["size"], d["mtime"], d["interval"], d["blocks"])
+
+    def is_current(self, filename):
+        """True if filename has the size and modification time it had when indexed."""
+        try:
+            return _file_id(filename) == (self.size, self.mtime)
+        except OSError:
+            return False
+
+    def byte_range(self, lo=None, hi=None):
+        """
+        Return (start, end), the byte offsets of the blocks that can hold ids lo <= id < hi
+        (either may be None). The file before start and from end has no such ids.
+        """
+        blocks = self.blocks
+        start = 0
+        if lo is not None:
+            for i, (offset, smallest, largest) in enumerate(blocks):
+                start = offset
+                if largest is None or largest >= lo:
+                    break
+            else:
+                return self.size, self.size
+        end = self.size
+        if hi is not None:
+            # the first block of the run of blocks at the end holding only ids >= hi
+            for offset, smallest, largest in reversed(blocks):
+                if offset < start or smallest is None or smallest < hi:
+                    break
+                end = offset
+        return start, end
+
+def load_current(filename):
+    """Return the index of filename, or None if there is no index matching the file."""
+    try:
+        index = OffsetIndex.load(index_path(filename))
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+    if not index.is_current(filename):
+        return None
+    return index
+
+def build_index(filename, interval=INTERVAL):
+    """Return the index of filename, building and saving it unless the saved one is current."""
+    index = load_current(filename)
+    if index is None or index.interval != interval:
+        index = OffsetIndex.build(filename, interval)
+        index.save(index_path(filename))
+    return index
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the sparse offset index of plain input files.")
+    parser.add_argument("file_names", metavar="file_name", nargs="+"
+            , help="Input file name")
+    parser.add_argument("-n", "--interval", dest="interval", type=int, default=INTERVAL
+            , help="Lines per index block (default %d)"%INTERVAL)
+    options = parser.parse_args()
+    for filename in options.file_names:
+        if not readers.is_plain_file(filename):
+            sys.stderr.write("ERROR %s is not an uncompressed file\n"%filename)
+            continue
+        index = build_index(filename, options.interval)
+        sys.stderr.write("%s: %d blocks\n"%(index_path(filename), len(index.blocks)))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import sys
+import time
+import errno
+import threading
+
+"""
+Buffered UTF-8 output. Rows are gathered into a large buffer that is encoded and written
+at once, instead of encoding and writing each row through a codecs writer.
+"""
+
+# buffered output (characters) written at once
+BUFFER_SIZE = 1 << 18
+# longest time (seconds) a row waits in the buffer
+FLUSH_INTERVAL = 1.0
+
+class OutputSink(object):
+    """
+    Write unicode (or ascii str) rows to a byte stream as UTF-8. The buffer is written when
+    it holds buffer_size characters, or by a timer thread once its first row has waited
+    flush_interval seconds, so a slow stream still comes out promptly, also while the
+    reader waits for input. When the reader goes away (EPIPE, e.g. gnacs ... | head),
+    write() returns False and nothing more is written. Errors of a flush by the timer are
+    raised by the next write(), flush() or close(). clock returns the time in seconds, e.g.
+    a fake clock for tests.
+    """
+
+    def __init__(self, stream=sys.stdout, buffer_size=BUFFER_SIZE, flush_interval=FLUSH_INTERVAL
+            , encoding="utf-8", clock=time.time):
+        self.stream = stream
+        self.clock = clock
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+        self.buf = []
+        self.buf_size = 0
+        # time the first row in the buffer was written
+        self.buf_time = None
+        # guards the buffer and the stream, shared with the timer thread
+        self.cond = threading.Condition(threading.Lock())
+        self.timer = None
+        self.closed = False
+        self.error = None
+        # True once the reader has gone away
+        self.broken = False
+        self.rows_written = 0
+        self.bytes_written = 0
+        # callables taking (rows written, bytes written), called after each flush
+        self.flush_callbacks = []
+
+    def write(self, row):
+        """Buffer row. Return False if the output is closed (broken pipe), else True."""
+        with self.cond:
+            if self.broken or self.error is not None:
+                # False, or the error of the timer
+                return self._flush()
+            if len(self.buf) == 0:
+                self.buf_time = self.clock()
+                self._start_timer()
+                self.cond.notify()
+            self.buf.append(row)
+            self.buf_size += len(row)
+            if self.buf_size >= self.buffer_size:
+                return self._flush()
+            return True
+
+    def flush(self):
+        """Write the buffered rows. Return False if the output is closed (broken pipe)."""
+        with self.cond:
+            return self._flush()
+
+    def close(self):
+        """Flush the buffer and stop the timer. Return False if the output is closed."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+            return self._flush()
+
+    def _start_timer(self):
+        if self.timer is not None or self.flush_interval is None or self.closed:
+            return
+        self.timer = threading.Thread(target=self._run_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _run_timer(self):
+        with self.cond:
+            while not self.closed and not self.broken and self.error is None:
+                if len(self.buf) == 0:
+                    # woken by the next row, or close()
+                    self.cond.wait()
+                    continue
+                delay = self.buf_time + self.flush_interval - self.clock()
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+                try:
+                    self._flush()
+                except IOError, e:
+                    self.error = e
+
+    def _flush(self):
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise e
+        if self.broken:
+            return False
+        if len(self.buf) == 0:
+            return True
+        data = u"".join(self.buf).encode(self.encoding)
+        rows = len(self.buf)
+        self.buf = []
+        self.buf_size = 0
+        try:
+            self.stream.write(data)
+            self.stream.flush()
+        except IOError, e:
+            if e.errno != errno.EPIPE:
+                raise
+            self._broken_pipe()
+            return False
+        self.rows_written += rows
+        self.bytes_written += len(data)
+        for callback in self.flush_callbacks:
+            callback(self.rows_written, self.bytes_written)
+        return True
+
+    def _broken_pipe(self):
+        self.broken = True
+        self.buf = []
+        self.buf_size = 0
+        # keep the interpreter from failing again when it flushes the stream at exit
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, self.stream.fileno())
+            os.close(devnull)
+        except (AttributeError, ValueError, OSError, IOError):
+            pass
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import sys
+import threading
+import multiprocessing
+# needed only for the pretty-printing
+import json as json_printer
+# use fastest option available
+try:
+    import ujson as json
+except ImportError:
+    try:
+        import json
+    except ImportError:
+        import simplejson as json
+
+# output modes, see format_record()
+DELIMITED = "delimited"
+PRETTY = "pretty"
+GEOJSON = "geojson"
+
+# number of input lines sent to a worker at a time
+BATCH_SIZE = 500
+# number of batches waiting for, or being processed by, each worker
+BATCHES_PER_WORKER = 4
+
+# set in each worker process by _init_worker()
+_processing_obj = None
+_output_mode = None
+
+def format_record(processing_obj, record, output_mode=DELIMITED):
+    """
+    Return the output string for one activity record, or None if the record produces no
+    output. Delimited and pretty output include the trailing newline. GeoJSON features
+    are returned without separators so the caller can build the FeatureCollection.
+    """
+    if output_mode == PRETTY:
+        return u"{}\n".format(json_printer.dumps(record, indent=3, ensure_ascii=False))
+    elif output_mode == GEOJSON:
+        # geo-tag coords
+        geo_rec = processing_obj.asGeoJSON(record)
+        if geo_rec is None:
+            return None
+        return json.dumps(geo_rec)
+    # ensure formatter is working on a unicode object
+    return u"{}\n".format(processing_obj.procRecord(record, emptyField="None"))
+
+def _init_worker(processing_obj, output_mode):
+    """Keep a copy of the configured processing object in each worker process."""
+    global _processing_obj, _output_mode
+    _processing_obj = processing_obj
+    _output_mode = output_mode
+
+def _process_batch(batch):
+    """
+    Decode and format a batch of (line number, raw line) tuples in a worker process. 
+    Return the list of output strings, and the stats of the batch (see stats.py) or None.
+    """
+    res = []
+    for line_number, record in _processing_obj.records(batch):
+        out = format_record(_processing_obj, record, _output_mode)
+        if out is not None:
+            res.append(out)
+    batch_stats = None
+    if _processing_obj.stats is not None:
+        batch_stats = _processing_obj.get_stats()
+        _processing_obj.stats.reset()
+    return res, batch_stats
+
+def _batches(lines, batch_size, slots):
+    """
+    Group (line number, raw line) tuples into lists of about batch_size. Blocks on slots so
+    only a bounded number of batches is ever queued for the pool.
+    """
+    batch = []
+    for x in lines:
+        # only split before a line starting a record, so a record over many lines 
+        # (e.g. pretty-printed) is decoded by one worker
+        if len(batch) >= batch_size and x[1].startswith("{"):
+            slots.acquire()
+            yield batch
+            batch = []
+        batch.append(x)
+    if len(batch) > 0:
+        slots.acquire()
+        yield batch
+
+def process_parallel(processing_obj
+        , lines
+        , workers
+        , output_mode=DELIMITED
+        , ordered=True
+        , batch_size=BATCH_SIZE
+        ):
+    """
+    Process (line number, raw line) tuples, e.g. from AcsCSV.line_reader(), with a pool
+    of worker processes each holding a copy of processing_obj. Yields the same output
+    strings as format_record(), in input order unless ordered is False. If stats are 
+    enabled on processing_obj, the stats of the workers are added to it.
+    """
+    slots = threading.BoundedSemaphore(workers*BATCHES_PER_WORKER)
+    pool = multiprocessing.Pool(workers
+            , initializer=_init_worker
+            , initargs=(processing_obj, output_mode)
+            )
+    try:
+        if ordered:
+            results = pool.imap(_process_batch, _batches(lines, batch_size, slots))
+        else:
+            results = pool.imap_unordered(_process_batch, _batches(lines, batch_size, slots))
+        for res, batch_stats in results:
+            slots.release()
+            if batch_stats is not None:
+                processing_obj.stats.merge(batch_stats)
+                processing_obj.stats.progress()
+            for out in res:
+                yield out
+        pool.close()
+    finally:
+        # also reached when the consumer stops early, e.g. on a broken pipe
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import time
+import functools
+
+"""
+Per-field extraction profile for AcsCSV.enable_profile(). Times are cumulative: a field
+that creates other fields (e.g. Field_activity_type creates Field_verb and Field_id)
+includes their time, and they are also listed on their own.
+"""
+
+# profile row of the key-path lookups shared by all the fields of an ExtractionPlan
+LOOKUPS = "(key-path lookups)"
+
+class FieldProfiler(object):
+    """
+    Cumulative time and number of calls per _Field subclass. wrap() times the creation of
+    field objects, e.g. Field_verb(d).value; ExtractionPlan.run() adds the time of each
+    field's fix_value() and post-processor, and of the shared key-path lookups.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.wrapped = []
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] = self.seconds.get(name, 0.) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def wrap(self, classes):
+        """Time the constructor of each class in classes, until unwrap()."""
+        for cls in classes:
+            if "_profiled_init" in cls.__dict__:
+                continue
+            cls._profiled_init = cls.__dict__.get("__init__")
+            cls.__init__ = self._timed_init(cls)
+            self.wrapped.append(cls)
+
+    def _timed_init(self, cls):
+        # the constructor a subclass would run without any wrappers
+        init = None
+        for c in cls.__mro__:
+            init = c.__dict__.get("_profiled_init", c.__dict__.get("__init__"))
+            if init is not None:
+                break
+        clock = time.time
+        name = cls.__name__
+        @functools.wraps(init)
+        def __init__(obj, *args, **kwargs):
+            start = clock()
+            try:
+                init(obj, *args, **kwargs)
+            finally:
+                self.add(name, clock() - start)
+        return __init__
+
+    def unwrap(self):
+        """Restore the constructors of the wrapped classes."""
+        for cls in self.wrapped:
+            init = cls.__dict__["_profiled_init"]
+            del cls._profiled_init
+            if init is None:
+                del cls.__init__
+            else:
+                cls.__init__ = init
+        self.wrapped = []
+
+    def as_dict(self):
+        """Return {name: {"seconds": s, "calls": n}}."""
+        return dict([ (k, {"seconds": self.seconds[k], "calls": self.calls[k]})
+                        for k in self.seconds ])
+
+    def ranked(self):
+        """Return a list of (name, seconds, calls), most time first."""
+        return sorted([ (k, self.seconds[k], self.calls[k]) for k in self.seconds ]
+                , key=lambda x: (-x[1], x[0]))
+
+    def table(self):
+        """Return a ranked table of the fields, with time per call in microseconds."""
+        res = ["{:<50} {:>10} {:>10} {:>10}".format("field", "seconds", "calls", "usec/call")]
+        for name, seconds, calls in self.ranked():
+            res.append("{:<50} {:>10.3f} {:>10} {:>10.2f}".format(name, seconds, calls
+                , 1e6*seconds/max(calls, 1)))
+        return "\n".join(res)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import re
+# use fastest option available
+try:
+    import ujson as json
+except ImportError:
+    try:
+        import json
+    except ImportError:
+        import simplejson as json
+
+"""
+Helpers that look at a raw (not yet decoded) JSON activity line. These only recognize the
+compact single-line shapes written by Gnip, and return None whenever they are unsure, so
+the caller can fall back to decoding the whole record.
+"""
+
+# compliance messages are short; longer lines are never checked
+COMPLIANCE_MAX_LEN = 2048
+
+verbRE = re.compile(r'"verb"\s*:\s*"(delete|scrub_geo)"')
+# the id must come before any nested object, and can't contain escapes
+objectIdRE = re.compile(r'"object"\s*:\s*\{[^{}]*?"id"\s*:\s*"([^"\\]*)"')
+actorIdRE = re.compile(r'"actor"\s*:\s*\{[^{}]*?"id"\s*:\s*"([^"\\]*)"')
+
+# Gnip activities start with the id
+leadingIdRE = re.compile(r'\s*\{\s*"id"\s*:\s*"([^"\\]*)"')
+# records run together on one line
+concatenatedRE = re.compile(r'\}\s*\{')
+
+def _unicode(x):
+    """Match the unicode strings returned by the JSON decoder."""
+    if isinstance(x, unicode):
+        return x
+    return x.decode("utf-8")
+
+def compliance_record(line, verbs=("delete", "scrub_geo")):
+    """
+    Take a raw line. If it is a single compliance message with one of verbs, return the
+    minimal record with the verb, the object and actor ids, and the leading id found, e.g.
+        {"verb": "delete", "object": {"id": "tag:search.twitter.com,2005:1234"}}
+    Otherwise return None. Deletes need the object id and scrub_geo messages need the
+    actor id.
+    """
+    if len(line) > COMPLIANCE_MAX_LEN:
+        return None
+    # quick check so activities skip the regexes
+    if '"delete"' not in line and '"scrub_geo"' not in line:
+        return None
+    line = line.strip()
+    if not line.startswith("{") or not line.endswith("}") or "}{" in line:
+        return None
+    m = verbRE.search(line)
+    if m is None or m.group(1) not in verbs:
+        return None
+    verb = m.group(1)
+    record = {"verb": _unicode(verb)}
+    m = leadingIdRE.match(line)
+    if m is not None:
+        record["id"] = _unicode(m.group(1))
+    m = objectIdRE.search(line)
+    if m is not None:
+        record["object"] = {"id": _unicode(m.group(1))}
+    elif verb == "delete":
+        return None
+    m = actorIdRE.search(line)
+    if m is not None:
+        record["actor"] = {"id": _unicode(m.group(1))}
+    elif verb == "scrub_geo":
+        return None
+    return record
+
+
+# one top-level member: "{" or ",", key, then a string, a scalar (number, true, false, null), or the
+# opening bracket of a nested value
+memberRE = re.compile(r'\s*([{,])\s*"([^"\\]*)"\s*:\s*(?:"((?:[^"\\]+|\\.)*)"|([^\s,{}\[\]"]+)|([{\[]))')
+endRE = re.compile(r'\s*\}\s*$')
+closing = {"{": "}", "[": "]"}
+# a string, a bracket, or a quote that doesn't start a complete string
+tokenRE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]|"')
+# the start of a line up to the first string holding a bracket, or an unterminated string
+bracketFreeRE = re.compile(r'[^"]*(?:"[^"\\{}\[\]]*(?:\\.[^"\\{}\[\]]*)*"[^"]*)*')
+
+# marks the values in a LazyRecord that are not decoded yet
+_UNDECODED = object()
+
+class LazyRecord(dict):
+    """
+    Activity record (dict) built by project_record(). The top-level values that were not
+    needed are kept as raw JSON text and decoded the first time they are used.
+    """
+    def __init__(self, values, raw):
+        dict.__init__(self, values)
+        self.raw = raw
+        for k in raw:
+            dict.__setitem__(self, k, _UNDECODED)
+
+    def __getitem__(self, k):
+        v = dict.__getitem__(self, k)
+        if v is _UNDECODED:
+            v = json.loads(self.raw.pop(k))
+            dict.__setitem__(self, k, v)
+        return v
+
+    def get(self, k, default=None):
+        if k in self:
+            return self[k]
+        return default
+
+    def decode_all(self):
+        """Decode any remaining raw values."""
+        for k in self.raw.keys():
+            self[k]
+        return self
+
+    def items(self):
+        return dict.items(self.decode_all())
+
+    def iteritems(self):
+        return dict.iteritems(self.decode_all())
+
+    def values(self):
+        return dict.values(self.decode_all())
+
+    def itervalues(self):
+        return dict.itervalues(self.decode_all())
+
+    def copy(self):
+        return dict(self.decode_all())
+
+    def __eq__(self, other):
+        if not isinstance(other, dict):
+            return False
+        return dict.__eq__(self.decode_all(), other)
+
+    def __ne__(self, other):
+        return not self == other
+
+def _skip_nested(line, start):
+    """
+    Take the position of the opening bracket of a nested value and return the position
+    after its closing bracket, or -1 if it can't be found. Only brackets of the same kind
+    are counted, so this is only right when no string in the line holds a bracket, see
+    project_record() and _scan_nested().
+    """
+    o = line[start]
+    c = closing[o]
+    depth = 0
+    pos = start
+    while True:
+        end = line.find(c, pos)
+        if end < 0:
+            return -1
+        depth += line.count(o, pos, end) - 1
+        pos = end + 1
+        if depth == 0:
+            return pos
+
+def _scan_nested(line, start):
+    """_skip_nested() for any line, skipping strings (with their escapes) whole."""
+    stack = []
+    for m in tokenRE.finditer(line, start):
+        t = m.group()
+        if t in closing:
+            stack.append(closing[t])
+        elif t == "]" or t == "}":
+            if not stack or stack.pop() != t:
+                return -1
+            if not stack:
+                return m.end()
+        elif len(t) == 1:
+            # a quote that doesn't start a complete string
+            return -1
+    return -1
+
+def leading_id(line):
+    """
+    Return the top-level id (str) at the start of a raw line holding one record, or None
+    if the line doesn't start with the id, or may hold more than one record.
+    """
+    m = leadingIdRE.match(line)
+    if m is None or concatenatedRE.search(line, m.end()) is not None:
+        return None
+    return m.group(1)
+
+def project_record(line, keys):
+    """
+    Take a raw line holding one JSON object and a set of top-level keys. Return a
+    LazyRecord with the values for keys decoded, and the other top-level values kept as
+    raw JSON text until they are used. Return None if the line isn't a single JSON object
+    in this form, so the caller can decode the whole line.
+    """
+    values = {}
+    raw = {}
+    pos = 0
+    # counting brackets is much faster than scanning the strings, and right unless a
+    # string holds a bracket, e.g. a :-{ in a tweet
+    skip_nested = _skip_nested
+    if bracketFreeRE.match(line).end() != len(line):
+        skip_nested = _scan_nested
+    try:
+        while True:
+            m = memberRE.match(line, pos)
+            if m is None:
+                if pos > 0 and endRE.match(line, pos):
+                    break
+                return None
+            sep, k, string, scalar, nested = m.groups()
+            if (sep == "{") != (pos == 0):
+                return None
+            if string is not None:
+                pos = m.end()
+                if k not in keys:
+                    raw[k] = line[m.start(3) - 1:pos]
+                elif "\\" in string:
+                    values[k] = json.loads(line[m.start(3) - 1:pos])
+                else:
+                    values[k] = _unicode(string)
+            elif scalar is not None:
+                pos = m.end()
+                if k not in keys:
+                    raw[k] = scalar
+                else:
+                    values[k] = json.loads(scalar)
+            else:
+                start = m.start(5)
+                pos = skip_nested(line, start)
+                if pos < 0:
+                    return None
+                if k not in keys:
+                    raw[k] = line[start:pos]
+                else:
+                    values[k] = json.loads(line[start:pos])
+    except ValueError:
+        # a value for keys isn't valid JSON
+        return None
+    return LazyRecord(values, raw)
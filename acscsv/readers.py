@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import bz2
+import zlib
+import Queue
+import threading
+import cStringIO
+
+"""
+Raw line readers for input files. These avoid the per-line overhead of fileinput for
+the common case of one local file; AcsCSV.line_reader() falls back to fileinput for
+standard input and strings.
+"""
+
+# read buffer for plain files
+READ_BUFFER = 1 << 20
+# extensions opened by fileinput.hook_compressed
+COMPRESSED_EXTENSIONS = (".gz", ".bz2")
+
+# compressed input read per chunk, and number of decompressed chunks read ahead
+CHUNK_SIZE = 1 << 18
+QUEUE_SIZE = 8
+
+def is_plain_file(filename):
+    """True if filename is a single, uncompressed local file."""
+    if not isinstance(filename, basestring) or filename == "-":
+        return False
+    if os.path.splitext(filename)[1] in COMPRESSED_EXTENSIONS:
+        return False
+    return os.path.isfile(filename)
+
+def file_lines(filename, buffer_size=READ_BUFFER):
+    """
+    Yield the raw lines of a plain file, newlines included. The built-in file iterator
+    finds newlines in large blocks in C, and lines aren't stripped or copied again.
+    """
+    with open(filename, "rb", buffer_size) as f:
+        for r in f:
+            yield r
+
+def range_lines(filename, start, end=None, buffer_size=READ_BUFFER):
+    """
+    Yield the raw lines of a plain file from byte offset start up to end (default the end
+    of the file). Both must be offsets of the start of a line, e.g. from an
+    offset_index.OffsetIndex or a checkpoint.
+    """
+    with open(filename, "rb", buffer_size) as f:
+        f.seek(start)
+        pos = start
+        for r in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(r)
+            yield r
+
+def split_range(size, k, n):
+    """Return the (start, end) byte offsets of the kth (1-based) of n ranges of size bytes."""
+    return size*(k - 1)//n, size*k//n
+
+def split_lines(filename, k, n, buffer_size=READ_BUFFER):
+    """
+    Yield the raw lines of the kth (1-based) of n byte ranges of a plain file, e.g. to 
+    process one large file with several processes or machines. As with Hadoop input 
+    splits, a split starts at the first record starting in its range, and ends with the 
+    last record starting in its range, even if that record runs past the end. Records 
+    start at lines beginning with "{", so a record over many lines (e.g. pretty-printed) 
+    stays in one split. Each line of the file is in exactly one of the n splits.
+    """
+    start, end = split_range(os.path.getsize(filename), k, n)
+    with open(filename, "rb", buffer_size) as f:
+        pos = 0
+        # the line holding the byte before start belongs to the previous split
+        started = start == 0
+        if not started:
+            pos = start - 1
+            f.seek(pos)
+            f.readline()
+            pos = f.tell()
+        for r in f:
+            # a record starting at or after end belongs to the next split
+            if pos >= end and (r.startswith("{") or not started):
+                break
+            if r.startswith("{"):
+                started = True
+            pos += len(r)
+            if started:
+                yield r
+
+def is_compressed_file(filename):
+    """True if filename is a single local file compressed with gzip or bzip2."""
+    if not isinstance(filename, basestring):
+        return False
+    if os.path.splitext(filename)[1] not in COMPRESSED_EXTENSIONS:
+        return False
+    return os.path.isfile(filename)
+
+def _decompressor(filename):
+    if filename.endswith(".bz2"):
+        return bz2.BZ2Decompressor()
+    # gzip header and trailer
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+def _put(chunks, x, stop):
+    """Put x on the queue unless the reader has stopped."""
+    while not stop.is_set():
+        try:
+            chunks.put(x, True, 0.1)
+            return
+        except Queue.Full:
+            pass
+
+def _stream_end(d):
+    """
+    True if the decompressor d has read the end of its stream (Python 2 has no eof). Only
+    for the end of the input, as the output of the bz2 probe is dropped.
+    """
+    if isinstance(d, bz2.BZ2Decompressor):
+        try:
+            d.decompress("")
+        except EOFError:
+            return True
+        return False
+    # input after the end of a zlib stream is left in unused_data
+    d = d.copy()
+    try:
+        d.decompress("\0")
+    except zlib.error:
+        return False
+    return d.unused_data != ""
+
+def _decompress(filename, chunks, stop, chunk_size):
+    """
+    Thread target for compressed_lines(). Put the decompressed chunks of filename on the 
+    chunks queue, then None. Errors are put on the queue to be raised by the reader,
+    IOError for corrupt data or a file ending in the middle of a stream, as from
+    gzip.open().
+    """
+    gzipped = not filename.endswith(".bz2")
+    try:
+        with open(filename, "rb") as f:
+            # None between streams
+            d = None
+            # small outputs, e.g. of small chunks, are put on the queue together
+            pending = []
+            pending_size = 0
+            while not stop.is_set():
+                data = f.read(chunk_size)
+                if not data:
+                    if d is not None and not _stream_end(d):
+                        raise IOError("%s is truncated, it ends in the middle of a compressed stream"%filename)
+                    break
+                while data:
+                    if d is None:
+                        if gzipped:
+                            # gzip files may be padded with zeros, as read by gzip.open()
+                            data = data.lstrip("\0")
+                            if not data:
+                                break
+                        d = _decompressor(filename)
+                    try:
+                        out = d.decompress(data)
+                    except EOFError:
+                        # the bz2 stream ended with the last chunk
+                        d = None
+                        continue
+                    except zlib.error, e:
+                        raise IOError("%s: %s"%(filename, e))
+                    # data after the end of a stream is the start of the next one, e.g. 
+                    # when hourly files are appended to an archive. A finished zlib stream
+                    # leaves all of the next chunk there.
+                    data = d.unused_data
+                    if data:
+                        d = None
+                    if out:
+                        pending.append(out)
+                        pending_size += len(out)
+                    if pending_size >= CHUNK_SIZE:
+                        _put(chunks, "".join(pending), stop)
+                        pending = []
+                        pending_size = 0
+            if pending:
+                _put(chunks, "".join(pending), stop)
+        _put(chunks, None, stop)
+    except Exception, e:
+        _put(chunks, e, stop)
+
+def compressed_lines(filename, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE, skip=0):
+    """
+    Yield the raw lines of a gzip or bzip2 file, newlines included. The file is read and
+    decompressed in large chunks on a background thread (zlib and bz2 release the GIL), 
+    with at most queue_size chunks waiting, so lines can be decoded at the same time. 
+    Files of several concatenated members are read to the end. The first skip bytes of
+    decompressed data, which must end at a line end, are dropped without splitting them
+    into lines.
+    """
+    chunks = Queue.Queue(queue_size)
+    stop = threading.Event()
+    t = threading.Thread(target=_decompress, args=(filename, chunks, stop, chunk_size))
+    t.daemon = True
+    t.start()
+    rest = ""
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            if skip > 0:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            lines = cStringIO.StringIO(rest + chunk).readlines()
+            rest = ""
+            if not lines[-1].endswith("\n"):
+                rest = lines.pop()
+            for r in lines:
+                yield r
+        if rest:
+            yield rest
+    finally:
+        # also reached when the consumer stops early
+        stop.set()
@@ -4,6 +4,12 @@ import re
 import time
 import datetime
 import calendar
+import array
+import collections
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 """
 From twitter code on github
@@ -34,6 +40,13 @@ SF_DC_BITS = 5
 SF_TIME_BITS = 41
 SF_BITS = 64
 
+SF_SEQ_MASK = (1 << SF_SEQ_BITS) - 1
+SF_WORK_MASK = (1 << SF_WORK_BITS) - 1
+SF_DC_MASK = (1 << SF_DC_BITS) - 1
+SF_TIME_SHIFT = SF_DC_BITS + SF_WORK_BITS + SF_SEQ_BITS
+# smallest id decode_batch() accepts, as Snowflake needs 18 digits
+SF_MIN_ID = 10**17
+
 nRE = re.compile("[0-9]{18}")
 
 class Snowflake(object):
@@ -85,7 +98,7 @@ class Snowflake(object):
 
     def masked_id(self, bits, pos):
         # returns an int
-        mask = int('1'*bits, 2) << pos
+        mask = ((1 << bits) - 1) << pos
         res = (mask & self.id) >> pos
         #print '%s' % bin(self.id).rjust(65)
         #print '%s' % bin(mask).rjust(65)
@@ -105,15 +118,183 @@ class Snowflake(object):
         res += "time:    %s\n"%self.timeString
         return res
 
+def encode(timestamp, data_center=0, worker=0, sequence=0):
+    """Return the snowflake id (int) of a time (seconds since the epoch, to the millisecond)
+    and the data center, worker and sequence numbers. Raise ValueError if a field is out
+    of range, e.g. for a time before the snowflake epoch."""
+    ts = int(round(timestamp * 1000)) - int(TWEPOCH)
+    for name, x, bits in [("time", ts, SF_TIME_BITS), ("data center", data_center, SF_DC_BITS)
+            , ("worker", worker, SF_WORK_BITS), ("sequence", sequence, SF_SEQ_BITS)]:
+        if not 0 <= x < (1 << bits):
+            raise ValueError("snowflake %s out of range: %s"%(name, x))
+    return ((ts << SF_TIME_SHIFT) | (data_center << (SF_WORK_BITS + SF_SEQ_BITS))
+            | (worker << SF_SEQ_BITS) | sequence)
+
+def min_id(timestamp, data_center=None, worker=None):
+    """Return the smallest id of the millisecond of timestamp, from any data center and
+    worker, or those given."""
+    return encode(timestamp, data_center or 0, worker or 0, 0)
+
+def max_id(timestamp, data_center=None, worker=None):
+    """Return the largest id of the millisecond of timestamp, from any data center and
+    worker, or those given."""
+    if data_center is None:
+        data_center = SF_DC_MASK
+    if worker is None:
+        worker = SF_WORK_MASK
+    return encode(timestamp, data_center, worker, SF_SEQ_MASK)
+
+def id_range(since=None, until=None):
+    """Return (lo, hi), the ids of the activities at or after since and before until
+    (seconds since the epoch, or None for no bound), so lo <= id < hi. Bounds before the
+    snowflake epoch are moved up to it, and bounds after the last time of SF_TIME_BITS
+    to the top of the id space."""
+    res = []
+    for t in (since, until):
+        if t is not None:
+            if int(round(t * 1000)) - int(TWEPOCH) >= 1 << SF_TIME_BITS:
+                t = 1 << (SF_BITS - 1)
+            else:
+                t = min_id(max(t, TWEPOCH/1000.))
+        res.append(t)
+    return tuple(res)
+
+def _max_ms():
+    # Snowflake rejects ids dated after next year
+    return calendar.timegm((datetime.datetime.now().year + 2, 1, 1, 0, 0, 0)) * 1000
+
+def valid_range():
+    """Return (lo, hi), the ids that Snowflake decodes, lo <= id < hi."""
+    return SF_MIN_ID, min_id(_max_ms()/1000.)
+
+def decode_batch(ids, time_strings=False):
+    """Decode a sequence (or NumPy array) of integer ids at once, without the per-id regex,
+    masks and time formatting of Snowflake. Returns an OrderedDict of columns
+        id, timestamp (seconds), data_center, worker, sequence, sample_set, valid
+    and time_string (as Snowflake.timeString) with time_strings=True. Columns are NumPy
+    arrays, or array.array without NumPy; time_string is a list. Ids that Snowflake
+    rejects are not valid, and have timestamp NaN, -1 in the other number columns and
+    time_string None."""
+    if numpy is not None:
+        return _decode_numpy(ids, time_strings)
+    return _decode_python(ids, time_strings)
+
+def _decode_numpy(ids, time_strings):
+    ids = numpy.asarray(ids, dtype=numpy.int64)
+    ts = ids >> SF_TIME_SHIFT
+    ms = ts + int(TWEPOCH)
+    valid = (ids >= SF_MIN_ID) & (ms < _max_ms())
+    res = collections.OrderedDict()
+    res["id"] = ids
+    res["timestamp"] = numpy.where(valid, ms / 1000., numpy.nan)
+    res["data_center"] = numpy.where(valid, (ids >> (SF_WORK_BITS + SF_SEQ_BITS)) & SF_DC_MASK, -1)
+    res["worker"] = numpy.where(valid, (ids >> SF_SEQ_BITS) & SF_WORK_MASK, -1)
+    res["sequence"] = numpy.where(valid, ids & SF_SEQ_MASK, -1)
+    res["sample_set"] = numpy.where(valid, ts % 100, -1)
+    res["valid"] = valid
+    if time_strings:
+        strings = (ms // 1000).astype("datetime64[s]").astype(str).tolist()
+        res["time_string"] = [ x if v else None for x, v in zip(strings, valid.tolist()) ]
+    return res
+
+def _decode_python(ids, time_strings):
+    max_ms = _max_ms()
+    twepoch = int(TWEPOCH)
+    cols = [ array.array("l"), array.array("d"), array.array("l"), array.array("l")
+            , array.array("l"), array.array("l"), array.array("b") ]
+    id_col, timestamp, data_center, worker, sequence, sample_set, valid = cols
+    strings = []
+    # ids are in time order, so the time string is rarely new
+    last_sec = None
+    last_string = None
+    for x in ids:
+        x = int(x)
+        id_col.append(x)
+        ts = x >> SF_TIME_SHIFT
+        ms = ts + twepoch
+        if x < SF_MIN_ID or ms >= max_ms:
+            timestamp.append(float("nan"))
+            for c in (data_center, worker, sequence, sample_set):
+                c.append(-1)
+            valid.append(0)
+            strings.append(None)
+            continue
+        timestamp.append(ms / 1000.)
+        data_center.append((x >> (SF_WORK_BITS + SF_SEQ_BITS)) & SF_DC_MASK)
+        worker.append((x >> SF_SEQ_BITS) & SF_WORK_MASK)
+        sequence.append(x & SF_SEQ_MASK)
+        sample_set.append(ts % 100)
+        valid.append(1)
+        if time_strings:
+            sec = ms // 1000
+            if sec != last_sec:
+                last_sec = sec
+                last_string = time.strftime(FMT, time.gmtime(sec))
+            strings.append(last_string)
+    res = collections.OrderedDict(zip(["id", "timestamp", "data_center", "worker", "sequence"
+            , "sample_set", "valid"], cols))
+    if time_strings:
+        res["time_string"] = strings
+    return res
+
+# ids decoded at once by the command line
+CHUNK = 100000
+# columns of the rows of the command line
+ROW_COLUMNS = 11
+
+def write_rows(ids, wrtr):
+    """
+    Write the CSV rows of the command line for a chunk of ids. Rows of invalid ids have
+    the id and empty columns.
+    """
+    d = decode_batch(ids, time_strings=True)
+    for x, seq, work, dc, t, tstr, valid in zip(d["id"].tolist(), d["sequence"].tolist()
+            , d["worker"].tolist(), d["data_center"].tolist(), d["timestamp"].tolist()
+            , d["time_string"], d["valid"].tolist()):
+        if not valid:
+            wrtr.writerow([x] + [None]*(ROW_COLUMNS - 1))
+            continue
+        sec = int(t)
+        wrtr.writerow([x, seq, work, dc, tstr, int(tstr[11:13]), int(tstr[14:16]), int(tstr[17:19])
+            , x % 100, (x >> SF_TIME_SHIFT) % 100, sec % 100])
+
+def snowflake_args():
+    import argparse
+    parser = argparse.ArgumentParser(description="Decode the snowflake ids in standard input,"
+            " or with -e, write the smallest and largest ids of UTC times.")
+    parser.add_argument("-e", "--encode", dest="encode", nargs="+", metavar="TIME", default=None
+            , help="UTC times (e.g. 2013-07-01T22:50:51 or 1372719051.5) to encode")
+    parser.add_argument("--data-center", dest="data_center", type=int, default=None
+            , help="Data center of the encoded ids (default any)")
+    parser.add_argument("--worker", dest="worker", type=int, default=None
+            , help="Worker of the encoded ids (default any)")
+    return parser
+
+def parse_timestamp(value):
+    """Parse a UTC time in FMT, or seconds since the epoch, into seconds since the epoch."""
+    try:
+        return float(value)
+    except ValueError:
+        return calendar.timegm(time.strptime(value.rstrip("Z"), FMT))
+
 if __name__ == "__main__":
     import csv
+    options = snowflake_args().parse_args()
     wrtr = csv.writer(sys.stdout)
+    if options.encode is not None:
+        for x in options.encode:
+            try:
+                t = parse_timestamp(x)
+                wrtr.writerow([x, min_id(t, options.data_center, options.worker)
+                    , max_id(t, options.data_center, options.worker)])
+            except ValueError, e:
+                sys.stderr.write("ERROR %s: %s\n"%(x, e))
+        sys.exit()
+    ids = []
     for r in sys.stdin:
-        ns = nRE.findall(r)
-        try:
-            for x in ns:
-                sf = Snowflake(x)
-                wrtr.writerow([sf.id, sf.sequence, sf.worker, sf.data_center, sf.timeString, sf.hour, sf.min, sf.sec] + sf.trials)
-        except IndexError:
-            sys.stderr.write( "ERROR %s"%ns)
+        ids.extend([ int(x) for x in nRE.findall(r) ])
+        if len(ids) >= CHUNK:
+            write_rows(ids, wrtr)
+            ids = []
+    write_rows(ids, wrtr)
 
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import sys
+import time
+
+"""
+Run statistics for AcsCSV.enable_stats(): the time spent in each processing stage, and
+counts of lines, bytes, records, invalid records and compliance messages. The stages are
+    read     reading and decompressing input lines
+    decode   JSON decoding (including filters)
+    extract  procRecordToList() and the keypath
+    clean    cleanField() and asString()
+    write    writing the output (timed by the caller, e.g. gnacs.py)
+With worker processes (see parallel.py), the times of the workers are kept apart as
+worker_seconds, the wall-clock seconds of all workers added up, which may be more than
+the elapsed time. Only the times of this process are shares of the elapsed time.
+"""
+
+STAGES = ["read", "decode", "extract", "clean", "write"]
+COUNTS = ["lines", "bytes", "records", "errors", "compliance", "filtered"]
+
+# records between checks of the clock for progress lines
+PROGRESS_CHECK = 1000
+
+class Stats(object):
+    """
+    Accumulate stage times and counts. Times are only taken at stage boundaries, a few
+    clock reads per record. With progress_interval (seconds), a progress line is written
+    to out about that often.
+    """
+
+    def __init__(self, progress_interval=None, out=sys.stderr):
+        self.progress_interval = progress_interval
+        self.out = out
+        self.reset()
+
+    def reset(self):
+        self.seconds = dict([ (k, 0.) for k in STAGES ])
+        self.worker_seconds = dict([ (k, 0.) for k in STAGES ])
+        self.counts = dict([ (k, 0) for k in COUNTS ])
+        self.start_time = time.time()
+        self.last_progress = self.start_time
+
+    def __getstate__(self):
+        # the output stream stays in the parent process, see parallel.py
+        state = self.__dict__.copy()
+        state["out"] = None
+        state["progress_interval"] = None
+        return state
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def lines(self, lines):
+        """
+        Yield the (line number, raw line) tuples of lines, adding the time spent getting
+        each one to the read stage, and counting lines and bytes.
+        """
+        clock = time.time
+        seconds = self.seconds
+        counts = self.counts
+        it = iter(lines)
+        while True:
+            start = clock()
+            try:
+                x = it.next()
+            except StopIteration:
+                break
+            seconds["read"] += clock() - start
+            counts["lines"] += 1
+            counts["bytes"] += len(x[1])
+            yield x
+
+    def record(self):
+        """Count an output record, and write a progress line if one is due."""
+        self.counts["records"] += 1
+        if self.counts["records"] % PROGRESS_CHECK == 0:
+            self.progress()
+
+    def progress(self):
+        """Write a progress line if progress_interval has passed since the last one."""
+        if self.progress_interval is None:
+            return
+        now = time.time()
+        if now - self.last_progress >= self.progress_interval:
+            self.last_progress = now
+            self.out.write(self.progress_line(now) + "\n")
+
+    def merge(self, other):
+        """
+        Add the counts of other, a dict from as_dict() of a worker, and its times to
+        worker_seconds.
+        """
+        for k, v in other["seconds"].items():
+            self.worker_seconds[k] += v
+        for k, v in other["counts"].items():
+            self.counts[k] += v
+
+    def as_dict(self):
+        """Return the times and counts as a dict (e.g. to dump as JSON)."""
+        elapsed = max(time.time() - self.start_time, 1e-9)
+        return {
+                "seconds": dict(self.seconds)
+                , "worker_seconds": dict(self.worker_seconds)
+                , "counts": dict(self.counts)
+                , "elapsed": elapsed
+                , "records_per_sec": self.counts["records"]/elapsed
+                , "mb_per_sec": self.counts["bytes"]/elapsed/1e6
+                }
+
+    def progress_line(self, now=None):
+        if now is None:
+            now = time.time()
+        elapsed = max(now - self.start_time, 1e-9)
+        return "{:.1f}s: {} records ({:.0f}/sec), {:.1f} MB ({:.2f} MB/sec), {} errors, {} compliance".format(
+                elapsed
+                , self.counts["records"]
+                , self.counts["records"]/elapsed
+                , self.counts["bytes"]/1e6
+                , self.counts["bytes"]/elapsed/1e6
+                , self.counts["errors"]
+                , self.counts["compliance"]
+                )
+
+    def summary(self):
+        """Return a multi-line summary of the stage times and counts."""
+        d = self.as_dict()
+        # wall-clock seconds of the workers added up, apart from the shares of the elapsed time
+        worker_total = sum(d["worker_seconds"].values())
+        res = ["{:<12} {:>10} {:>7}".format("stage", "seconds", "share")]
+        if worker_total > 0:
+            res[0] += " {:>11}".format("worker wall")
+        for k in STAGES:
+            line = "{:<12} {:>10.3f} {:>7.1%}".format(k, d["seconds"][k], d["seconds"][k]/d["elapsed"])
+            if worker_total > 0:
+                line += " {:>11.3f}".format(d["worker_seconds"][k])
+            res.append(line)
+        other = d["elapsed"] - sum(d["seconds"].values())
+        res.append("{:<12} {:>10.3f} {:>7.1%}".format("other", max(other, 0.), max(other, 0.)/d["elapsed"]))
+        total = "{:<12} {:>10.3f}".format("total", d["elapsed"])
+        if worker_total > 0:
+            total += " {:>7} {:>11.3f}".format("", worker_total)
+        res.append(total)
+        for k in COUNTS:
+            res.append("{:<12} {:>10}".format(k, d["counts"][k]))
+        res.append("{:<12} {:>10.0f}".format("records/sec", d["records_per_sec"]))
+        res.append("{:<12} {:>10.2f}".format("MB/sec", d["mb_per_sec"]))
+        return "\n".join(res)
@@ -4,6 +4,7 @@ __author__="Scott Hendrickson"
 __license__="Simplified BSD"
 
 import unittest
+import acscsv
 from acscsv import *  
 
 class TestAcsCSV(unittest.TestCase):
@@ -25,6 +26,98 @@ class TestAcsCSV(unittest.TestCase):
         self.assertEquals(b.cleanField(245), "245")
         self.assertEquals(b.cleanField(a), INTERNAL_EMPTY_FIELD)
 
+    def testCleanRow(self):
+        row = [u" a|b\n\rc,d ", "x|y\n", u"\xe9|\n", 5, 5L, 1.5, None, True, [1], u"", "\t|\t"]
+        for delim in ["|", ",", "\t", "||", ""]:
+            a = AcsCSV(delim, False)
+            # same values as the original strip() and replace() chain
+            expected = [ a._cleanOther(x) for x in row ]
+            self.assertEquals(a.cleanRow(row), expected)
+            self.assertEquals([ a.cleanField(x) for x in row ], expected)
+            self.assertEquals([ type(x) for x in a.cleanRow(row) ], [ type(x) for x in expected ])
+        a = AcsCSV("|", False)
+        self.assertEquals(a.cleanRow(row)[:4], [u"a b  c,d", "x y", u"\xe9 ", "5"])
+
+    def testBuildListString(self):
+        a = AcsCSV("|", False)
+        self.assertEquals(a.buildListString([]), "[]")
+        self.assertEquals(a.buildListString([u"a", u"b (c)"]), u"['a','b (c)']")
+        self.assertEquals(type(a.buildListString(["a"])), str)
+        self.assertEquals(type(a.buildListString([u"a"])), unicode)
+        l = [1, None, u"x", [u"y", [2.5]], [], True]
+        expected = u"['1','None','x','['y','['2.5']']','[]','True']"
+        self.assertEquals(a.buildListString(l), expected)
+        parts = []
+        a.writeListString(l, parts.append)
+        self.assertEquals("".join(parts), expected)
+        rules = [ u"rule %d (tag)"%i for i in range(10000) ]
+        self.assertEquals(a.buildListString(rules), u"[" + u",".join([ u"'%s'"%r for r in rules ]) + u"]")
+
+    def testKeyPaths(self):
+        d = {"a": {"b": [{"c": 1, "d": u"x"}, {"c": 2}, {"d": [u"y", u"z"]}], "e": u"f"}, "g": None}
+        r = KeyPathResolver(["a:b:0:c", "a:e", "a:b:*:c", "a:b:*:d", "a:b:*:d:*", "a:x", "a:b:5"
+                , "a:e:0", "g", "g:*", "a:*:0:c", "a:b:-1:d:1"])
+        self.assertEquals(r.resolve(d), [u"1", u"f", [u"1", u"2"], [u"x", u"[u'y', u'z']"]
+            , [u"y", u"z"], "PATH_EMPTY", "PATH_EMPTY", u"f", u"None", "PATH_EMPTY", [u"1"], u"z"])
+        # shared prefixes are looked up once
+        self.assertEquals([ k for k, child in r.root[1] ], ["a", "g"])
+        self.assertEquals(KeyPathResolver(["a,b,1,c"], ",").resolve(d), [u"2"])
+        # one or several keypaths add output columns
+        a = AcsCSV("|", "a:e")
+        self.assertEquals(a.keyPath(d), u"f")
+        self.assertEquals(a.keyPaths(d), [u"f"])
+        a = AcsCSV("|", ["a:e", "a:b:*:c", "a:y"])
+        self.assertEquals(a.keyPaths(d), [u"f", u"['1','2']", "PATH_EMPTY"])
+
+    def testExtractionPlan(self):
+        class Field_a(acscsv._Field):
+            path = ['a']
+        class Field_b_0_c(acscsv._Field):
+            path = ['b', 0, 'c']
+            @classmethod
+            def fix_value(cls, value):
+                if value != cls.default_value:
+                    value = value.upper()
+                return value
+        plan = ExtractionPlan().add(Field_a).add(Field_b_0_c).add(Field_a, lambda x: "<%s>"%x)
+        self.assertEquals(plan.labels(), ["a", "b:0:c", "a"])
+        self.assertEquals(plan.run({"a": 1, "b": [{"c": "x"}]}), [1, "X", "<1>"])
+        self.assertEquals(plan.run({"a": None, "b": []})
+                , [INTERNAL_EMPTY_FIELD, INTERNAL_EMPTY_FIELD, "<%s>"%INTERNAL_EMPTY_FIELD])
+        self.assertEquals(plan.run({"a": [], "b": {"0": {"c": "x"}}})
+                , [INTERNAL_EMPTY_FIELD, INTERNAL_EMPTY_FIELD, "<%s>"%INTERNAL_EMPTY_FIELD])
+        self.assertEquals(Field_b_0_c({"b": [{"c": "x"}]}).value, "X")
+
+    def testMultiPathExtractor(self):
+        class CountingDict(dict):
+            lookups = 0
+            def __getitem__(self, k):
+                CountingDict.lookups += 1
+                return super(CountingDict, self).__getitem__(k)
+        record = CountingDict({"actor": {"id": 1, "displayName": "a", "languages": []}
+                    , "gnip": {"profileLocations": [ {"geo": {"type": "Point"}, "address": None} ]}
+                    })
+        e = MultiPathExtractor([ ["actor", "id"]
+                , ["actor", "displayName"]
+                , ["actor", "languages"]
+                , ["actor", "verified"]
+                , ["gnip", "profileLocations", 0, "geo", "type"]
+                , ["gnip", "profileLocations", 0, "address", "country"]
+                , ["gnip", "profileLocations", 1, "geo", "type"]
+                , ["actor", "id"]
+                , []
+                ]
+                , [INTERNAL_EMPTY_FIELD]*3 + [False] + [INTERNAL_EMPTY_FIELD]*5)
+        res = e.extract(record)
+        self.assertEquals(res[:-1], [1, "a", INTERNAL_EMPTY_FIELD, False, "Point"
+                , INTERNAL_EMPTY_FIELD, INTERNAL_EMPTY_FIELD, 1])
+        self.assertTrue(res[-1] is record)
+        # each top-level subtree is looked up once
+        self.assertEquals(CountingDict.lookups, 2)
+        self.assertEquals(e.extract(None), e.defaults)
+        self.assertEquals(e.extract({"actor": None})[:4]
+                , [INTERNAL_EMPTY_FIELD]*3 + [False])
+
 
 if __name__ == "__main__":
     unittest.main()
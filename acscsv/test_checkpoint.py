@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from checkpoint import *
+from output import OutputSink
+from twitter_acs import TwacsCSV
+
+class TestCheckpoint(unittest.TestCase):
+    """Unit tests of checkpoint and resume"""
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        lines = [ l for l in open("./data/twitter_sample.json") ]
+        # two records on one line, and a record over two lines
+        lines.append(lines[0].strip() + lines[1])
+        lines.append(lines[2].replace(',"', ',\n"', 1))
+        self.plain = os.path.join(self.tmpdir, "input.json")
+        with open(self.plain, "wb") as f:
+            f.write("".join(lines))
+        self.compressed = os.path.join(self.tmpdir, "input.json.gz")
+        with gzip.open(self.compressed, "wb") as f:
+            f.write("".join(lines))
+        self.output = os.path.join(self.tmpdir, "output.txt")
+        self.path = os.path.join(self.tmpdir, "checkpoint.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_gnacs(self, input_name, stop_after=None):
+        """
+        Process input_name to the output with a checkpoint after every row, as gnacs.py
+        does. With stop_after, write stop_after rows and some uncommitted rows, then stop.
+        """
+        with open(self.output, "ab") as f:
+            sink = OutputSink(f, buffer_size=1)
+            ck = Checkpoint(self.path, input_name, sink, interval=0)
+            start = ck.begin(f)
+            o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+            o.set_checkpoint(ck)
+            n = 0
+            for line_number, record in o.file_reader(input_name, start=start):
+                if n == stop_after:
+                    f.write("uncommitted\n" * 3)
+                    return
+                sink.write(o.procRecord(record) + "\n")
+                n += 1
+            sink.close()
+            ck.save(*o.input_position, complete=True)
+
+    def check_resume(self, input_name, stops):
+        self.run_gnacs(input_name)
+        expected = open(self.output).read()
+        self.assertTrue(expected.count("\n") > 60)
+        os.remove(self.output)
+        os.remove(self.path)
+        for stop_after in stops:
+            self.run_gnacs(input_name, stop_after)
+        self.run_gnacs(input_name)
+        self.assertEquals(open(self.output).read(), expected)
+        # a complete run adds nothing
+        self.run_gnacs(input_name)
+        self.assertEquals(open(self.output).read(), expected)
+
+    def test_resume(self):
+        self.check_resume(self.plain, [0, 10, 11, 30, 58, 60])
+
+    def test_resume_compressed(self):
+        self.check_resume(self.compressed, [5, 40, 59, 61])
+
+    def test_errors(self):
+        self.run_gnacs(self.plain, 5)
+        sink = OutputSink(open(os.devnull, "wb"))
+        self.assertRaises(ValueError, Checkpoint(self.path, self.compressed, sink).load)
+        ck = Checkpoint(self.path, self.plain, sink)
+        state = ck.load()
+        self.assertEquals(state["output_rows"], 5)
+        self.assertFalse(state["complete"])
+        # the output was truncated, e.g. opened with >
+        with open(self.output, "wb") as f:
+            self.assertRaises(ValueError, ck.begin, f)
+
+
+if __name__ == "__main__":
+    unittest.main()
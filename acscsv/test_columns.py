@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import sys
+import copy
+import math
+import unittest
+from StringIO import StringIO
+from columns import *
+from acscsv import INTERNAL_EMPTY_FIELD, gnipError, gnipRemove
+from twitter_acs import TwacsCSV
+from disqus_acs import DiacsCSV
+
+class TestColumns(unittest.TestCase):
+    """Unit tests of columnar batch extraction"""
+    def setUp(self):
+        self.datafile = "./data/twitter_sample.json"
+        self.stderr = sys.stderr
+        sys.stderr = StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+
+    def test_typed_column(self):
+        missing = (INTERNAL_EMPTY_FIELD,)
+        x = typed_column([1, 2L, 3], missing)
+        self.assertEquals(list(x), [1, 2, 3])
+        self.assertEquals(x.dtype.name if numpy else x.typecode, "int64" if numpy else "l")
+        x = typed_column([1, None, 2.5, INTERNAL_EMPTY_FIELD], missing)
+        self.assertEquals(list(x)[::2], [1., 2.5])
+        self.assertTrue(math.isnan(x[1]) and math.isnan(x[3]))
+        self.assertEquals(typed_column([u"a", 1, INTERNAL_EMPTY_FIELD, None], missing)
+                , [u"a", 1, None, None])
+        self.assertEquals(typed_column([True, 1], missing), [True, 1])
+        self.assertEquals(typed_column([], missing), [])
+        self.assertEquals(list(typed_column([2**70, 1], missing)), [2.**70, 1.])
+        self.assertEquals(unique_names(["a", "b", "a", "a"]), ["a", "b", "a.1", "a.2"])
+
+    def test_extract_batch(self):
+        o = TwacsCSV("|", ["actor:followersCount", "gnip:matching_rules:*:value"]
+                , True, True, True, True, True, True, True)
+        records = [ r for i, r in o.file_reader(self.datafile) ]
+        records.append({"verb": "delete", "object": {"id": "tag:search.twitter.com,2005:1"}})
+        batch = o.extract_batch(records)
+        names = o.column_names()
+        self.assertEquals(len(batch), len(names))
+        self.assertEquals(batch.keys()[:3], ["Tweet ID", "Posted Time", "Body"])
+        self.assertTrue("List of URLs (Twitter).1" in batch)
+        rows = [ o.procRecordToList(r) for r in records[:-1] ]
+        self.assertEquals(batch["Tweet ID"], [ r[0] for r in rows ])
+        followers = batch["User Follower Count"]
+        self.assertFalse(isinstance(followers, list))
+        self.assertEquals(list(followers), [ r["actor"]["followersCount"] for r in records[:-1] ])
+        self.assertEquals(list(batch["actor:followersCount"]), list(followers))
+        self.assertEquals(batch["gnip:matching_rules:*:value"][0], [u"has:geo"])
+        self.assertEquals(batch["User-chosen Location Name"][0], None)
+        # a url without expanded_url gives an error row, left out of the batch, while the
+        # record on its own raises
+        bad = copy.deepcopy(records[0])
+        bad["twitter_entities"]["urls"] = [{"url": "http://t.co/x"}]
+        self.assertRaises(KeyError, o.procRecordToList, bad)
+        some = [records[0], bad, records[-1], records[1]]
+        rows = list(o.batch_rows(some))
+        self.assertEquals([ i for i, r in rows ], [0, 1, 3])
+        self.assertEquals(rows[1][1], [gnipError, gnipRemove])
+        batch = o.extract_batch(some, index="record")
+        self.assertEquals(batch.keys()[:2], ["record", "Tweet ID"])
+        self.assertEquals(list(batch["record"]), [0, 3])
+        self.assertEquals(batch["Tweet ID"], [ rows[0][1][0], rows[2][1][0] ])
+        # publishers without column names
+        o = DiacsCSV("|", None, False, False, False, False, False)
+        records = [ r for i, r in o.file_reader("./data/disqus_sample.json") ]
+        batch = o.extract_batch(records)
+        self.assertEquals(batch.keys(), [0, 1, 2])
+        self.assertEquals(len(batch[0]), len(records) - 1)
+        self.assertEquals(len(o.extract_batch(records, index="record")["record"]), len(records) - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
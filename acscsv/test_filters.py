@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import unittest
+from filters import *
+from twitter_acs import TwacsCSV
+
+# an activity with a pre-snowflake id
+OLD = '{"id":"tag:search.twitter.com,2005:12341324132","verb":"post","postedTime":"2010-06-01T10:00:00.000Z","body":"x"}'
+DELETE = '{"verb":"delete","object":{"id":"tag:search.twitter.com,2005:351835319794020353"}}'
+INFO = '{"info":{"message":"Replay Request Completed"}}'
+
+class TestFilters(unittest.TestCase):
+    """Unit tests of record filters"""
+    def setUp(self):
+        self.datafile = "./data/twitter_sample.json"
+        self.lines = [ l for l in open(self.datafile) ] + [DELETE, INFO]
+        # two records on one line
+        self.lines.append(self.lines[0].strip() + self.lines[1])
+        self.lines.append(OLD)
+
+    def tearDown(self):
+        pass
+
+    def test_record_id(self):
+        self.assertEquals(record_id({"id": u"tag:search.twitter.com,2005:1", "object": {"id": 2}})
+                , "tag:search.twitter.com,2005:1")
+        self.assertEquals(record_id({"object": {"id": 2}}), "2")
+        self.assertEquals(record_id({"verb": "scrub_geo", "actor": {"id": u"id:twitter.com:5"}})
+                , "id:twitter.com:5")
+        self.assertEquals(record_id({"info": {"message": "x"}}), None)
+
+    def test_shard_raw(self):
+        """The raw check agrees with the check of the decoded record."""
+        o = TwacsCSV("|", None, False, False, False, False, False, False, False)
+        for n in [1, 2, 3, 5]:
+            for k in range(1, n + 1):
+                f = ShardFilter(k, n)
+                for i, r in o.records(enumerate(self.lines)):
+                    raw = f.check_raw(self.lines[i])
+                    if raw is not None:
+                        self.assertEquals(raw, f.check_record(r))
+        self.assertEquals(ShardFilter(1, 2).check_raw(DELETE), None)
+
+    def test_shards(self):
+        """Every record is in exactly one shard, in the same shard as its delete."""
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        expected = [ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ]
+        for n in [2, 3, 5]:
+            res = []
+            for k in range(1, n + 1):
+                o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+                o.add_filter(ShardFilter(k, n))
+                shard = [ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ]
+                # shards are not empty
+                self.assertTrue(len(shard) > 0)
+                res.extend(shard)
+                has_delete = any([ x.endswith("GNIPREMOVE-delete") for x in shard ])
+                has_activity = any([ x.startswith("351835319794020353|2013") for x in shard ])
+                self.assertEquals(has_delete, has_activity)
+            self.assertEquals(sorted(res), sorted(expected))
+
+    def test_parse_time(self):
+        self.assertEquals(parse_time("2013-07-01T22:50:51"), 1372719051)
+        self.assertEquals(parse_time("2013-07-01T22:50:51Z"), 1372719051)
+        self.assertEquals(parse_time("2013-07-01T22:50"), 1372719000)
+        self.assertEquals(parse_time("2013-07-01"), 1372636800)
+        self.assertRaises(ValueError, parse_time, "07/01/2013")
+
+    def test_time_window_raw(self):
+        """The raw check agrees with the check of the decoded record."""
+        o = TwacsCSV("|", None, False, False, False, False, False, False, False)
+        records = list(o.records(enumerate(self.lines)))
+        checked = 0
+        for since, until in [("2013-07-01T22:50:52", None), (None, "2013-07-01T22:50:52")
+                , ("2013-07-01T22:50:52", "2014-06-18T17:14:24"), ("2010-01-01", "2010-12-31")]:
+            f = TimeWindowFilter(since and parse_time(since), until and parse_time(until))
+            for i, r in records:
+                raw = f.check_raw(self.lines[i])
+                if raw is not None:
+                    checked += 1
+                    self.assertEquals(raw, f.check_record(r))
+        self.assertTrue(checked > 0)
+        self.assertEquals(TimeWindowFilter(0, 1).check_raw(DELETE), None)
+        self.assertEquals(TimeWindowFilter(0, 1).check_raw(OLD), None)
+
+    def test_time_window(self):
+        """Adjacent windows split the activities; compliance messages are in every window."""
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        expected = [ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ]
+        t = parse_time("2013-07-01T22:50:52")
+        res = []
+        for since, until in [(None, t), (t, None)]:
+            o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+            o.add_filter(TimeWindowFilter(since, until))
+            window = [ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ]
+            self.assertTrue(len(window) > 1)
+            self.assertEquals(len([ x for x in window if x.endswith("GNIPREMOVE-delete") ]), 1)
+            res.extend(window)
+        self.assertEquals(sorted(set(res)), sorted(set(expected)))
+        self.assertEquals(len(res), len(expected) + 2)
+        # the pre-snowflake activity is checked by its postedTime
+        f = TimeWindowFilter(parse_time("2010-06-01"), parse_time("2010-06-02"))
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        o.add_filter(f)
+        window = [ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ]
+        self.assertEquals([ x.split("|")[0] for x in window if "GNIP" not in x ], ["12341324132"])
+
+    def test_sample(self):
+        """The raw check agrees with the decoded check, and samples by Snowflake.sample_set."""
+        from snowflake import Snowflake
+        o = TwacsCSV("|", None, False, False, False, False, False, False, False)
+        records = list(o.records(enumerate(self.lines)))
+        for p in [1, 10, 50, 100]:
+            f = SampleFilter(p)
+            for i, r in records:
+                raw = f.check_raw(self.lines[i])
+                if raw is not None:
+                    self.assertEquals(raw, f.check_record(r))
+                activity_id = record_id(r)
+                if activity_id is not None and f.snowflake_id(activity_id) is not None:
+                    sample_set = Snowflake(activity_id.rsplit(":", 1)[-1]).sample_set
+                    self.assertEquals(f.check_record(r), sample_set < p)
+        self.assertEquals(SampleFilter(1).sample_set("tag:search.twitter.com,2005:351835320003727360"), 73)
+        # the delete is kept with its activity
+        self.assertTrue(SampleFilter(2).check_record({"verb": "delete"
+            , "object": {"id": "tag:search.twitter.com,2005:351835320121176064"}}))
+        self.assertFalse(SampleFilter(2).check_record({"verb": "delete"
+            , "object": {"id": "tag:search.twitter.com,2005:351835320003727360"}}))
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        expected = [ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ]
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        o.add_filter(SampleFilter(100))
+        self.assertEquals([ o.procRecord(r) for i, r in o.records(enumerate(self.lines)) ], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
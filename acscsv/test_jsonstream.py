@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import sys
+import unittest
+import json
+from StringIO import StringIO
+from jsonstream import *
+from twitter_acs import TwacsCSV
+
+class TestJSONStream(unittest.TestCase):
+    """Unit tests of incremental JSON decoding"""
+    def setUp(self):
+        self.stderr = sys.stderr
+        sys.stderr = StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+
+    def decode(self, lines):
+        s = JSONStream()
+        res = []
+        for i, r in enumerate(lines):
+            res.extend(s.feed(r, i + 1))
+        res.extend(s.close())
+        return res
+
+    def test_concatenated(self):
+        lines = ['{"a": 1}{"body": "}{"} {"c": [{}]}\n', '{"d": 4}\n']
+        self.assertEquals(self.decode(lines)
+                , [(1, {"a": 1}), (1, {"body": "}{"}), (1, {"c": [{}]}), (2, {"d": 4})])
+        self.assertEquals(sys.stderr.getvalue(), "")
+
+    def test_multiline(self):
+        recs = [{"a": {"b": [1, 2, {"c": "{"}]}}, {"body": "x\ny"}, {}]
+        lines = []
+        for rec in recs:
+            lines.extend(json.dumps(rec, indent=3).splitlines(True))
+            lines.append("\n")
+        self.assertEquals(self.decode(lines), [(1, recs[0]), (13, recs[1]), (17, recs[2])])
+        # split between tokens of a compact record
+        self.assertEquals(self.decode(['{"a":\n', ' 1, "b": \n', '"}"}{"c":\n', '2}\n'])
+                , [(1, {"a": 1, "b": "}"}), (3, {"c": 2})])
+        self.assertEquals(sys.stderr.getvalue(), "")
+
+    def test_invalid(self):
+        lines = ['{"a": 1}\n', 'not json\n', '\n', '{"b": \n', '{"c": 3}\n', '{"d": tru}\n'
+                , '{"e": 5}{"f": \n']
+        self.assertEquals(self.decode(lines), [(1, {"a": 1}), (5, {"c": 3}), (7, {"e": 5})])
+        self.assertEquals(sys.stderr.getvalue().splitlines()
+                , ['Invalid JSON record (2) not json, skipping'
+                    , 'Invalid JSON record (4) {"b":, skipping'
+                    , 'Invalid JSON record (6) {"d": tru}, skipping'
+                    , 'Invalid JSON record (7) {"f":, skipping'])
+
+    def test_records(self):
+        """Pretty-printed output decodes to the same records."""
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        datafile = "./data/twitter_sample.json"
+        expected = [ r for i, r in o.file_reader(datafile) ]
+        pretty = "".join([ json.dumps(r, indent=3) + "\n" for r in expected ])
+        self.assertEquals([ r for i, r in o.file_reader(json_string=pretty) ], expected)
+        compact = "".join([ json.dumps(r) for r in expected ])
+        self.assertEquals([ r for i, r in o.file_reader(json_string=compact) ], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import shutil
+import tempfile
+import unittest
+from offset_index import *
+from filters import TimeWindowFilter, parse_time
+from twitter_acs import TwacsCSV
+
+DELETE = '{"verb":"delete","object":{"id":"tag:search.twitter.com,2005:%d"}}\n'
+
+class TestOffsetIndex(unittest.TestCase):
+    """Unit tests of the sparse offset index"""
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.datafile = os.path.join(self.tmpdir, "twitter_sample.json")
+        shutil.copy("./data/twitter_sample.json", self.datafile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_build(self):
+        self.assertEquals(load_current(self.datafile), None)
+        index = build_index(self.datafile, 5)
+        self.assertTrue(len(index.blocks) > 2)
+        self.assertEquals(index.blocks[0][0], 0)
+        data = open(self.datafile, "rb").read()
+        for offset, smallest, largest in index.blocks:
+            # blocks start at a record
+            self.assertTrue(offset == 0 or data[offset - 1] == "\n")
+            self.assertTrue(smallest <= largest)
+        saved = load_current(self.datafile)
+        self.assertEquals(saved.blocks, index.blocks)
+        self.assertEquals(saved.byte_range(), (0, len(data)))
+        # a changed file has no current index
+        with open(self.datafile, "ab") as f:
+            f.write(data.split("\n")[0] + "\n")
+        self.assertEquals(load_current(self.datafile), None)
+        self.assertNotEquals(build_index(self.datafile, 5).size, index.size)
+
+    def test_windows(self):
+        """Reading with the index keeps the activities in the window."""
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        # compliance messages apply to activities of any time
+        lines = []
+        for i, r in enumerate(open(self.datafile, "rb")):
+            lines.append(r)
+            if i % 4 == 3:
+                lines.append(DELETE%i)
+        with open(self.datafile, "wb") as f:
+            f.write("".join(lines))
+        build_index(self.datafile, 5)
+        index = load_current(self.datafile)
+        f = TimeWindowFilter(parse_time("2014-01-01"), None)
+        self.assertTrue(index.byte_range(f.lo, f.hi)[0] > 0)
+        windows = [("2013-07-01T22:50:52", None), (None, "2013-07-01T22:50:52")
+                , ("2014-06-18T17:14:24", "2014-06-18T17:14:25")
+                , ("2013-07-01T00:00:05", "2013-07-01T00:00:12"), ("2015-01-01", None)]
+        for since, until in windows:
+            f = TimeWindowFilter(since and parse_time(since), until and parse_time(until))
+            o.filters = [f]
+            expected = [ o.procRecord(r) for i, r in o.file_reader(self.datafile) ]
+            res = [ o.procRecord(r) for i, r in o.file_reader(self.datafile, id_range=(f.lo, f.hi)) ]
+            # compliance messages of the blocks skipped too
+            self.assertEquals(res, expected)
+        # the last window is after the file, it only has the compliance messages
+        self.assertEquals([ x for x in res if "GNIPREMOVE" not in x ], [])
+        start, end = index.byte_range(f.lo, f.hi)
+        self.assertEquals(start, end)
+
+    def test_no_snowflake(self):
+        """Blocks with an activity without a snowflake id are never skipped."""
+        lines = open(self.datafile, "rb").readlines()
+        old = '{"id":"tag:search.twitter.com,2005:12341324132","verb":"post"'
+        old += ',"postedTime":"2010-06-01T10:00:00.000Z","body":"x"}\n'
+        lines.insert(len(lines)/2, old)
+        with open(self.datafile, "wb") as f:
+            f.write("".join(lines))
+        index = build_index(self.datafile, 5)
+        self.assertTrue([ b for b in index.blocks if b[1] is None ])
+        o = TwacsCSV("|", None, False, False, False, False, False, False, False)
+        f = TimeWindowFilter(parse_time("2010-06-01"), parse_time("2010-06-02"))
+        o.filters = [f]
+        expected = [ o.procRecord(r) for i, r in o.file_reader(self.datafile) ]
+        self.assertEquals(expected, ["12341324132|2010-06-01T10:00:00.000Z|x"])
+        res = [ o.procRecord(r) for i, r in o.file_reader(self.datafile, id_range=(f.lo, f.hi)) ]
+        self.assertEquals(res, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import time
+import errno
+import threading
+import unittest
+from StringIO import StringIO
+from output import *
+
+class ClosedStream(StringIO):
+    """A stream whose reader has gone away."""
+    def write(self, data):
+        raise IOError(errno.EPIPE, "Broken pipe")
+
+class TestOutput(unittest.TestCase):
+    """Unit tests of the buffered output sink"""
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_buffer(self):
+        f = StringIO()
+        sink = OutputSink(f, buffer_size=10, flush_interval=None)
+        flushes = []
+        sink.flush_callbacks.append(lambda rows, size: flushes.append((rows, size)))
+        self.assertTrue(sink.write(u"Güneş|1\n"))
+        self.assertEquals(f.getvalue(), "")
+        self.assertTrue(sink.write("2\n"))
+        self.assertEquals(f.getvalue(), u"Güneş|1\n2\n".encode("utf-8"))
+        self.assertTrue(sink.write(u"3\n"))
+        self.assertTrue(sink.close())
+        self.assertEquals(f.getvalue(), u"Güneş|1\n2\n3\n".encode("utf-8"))
+        self.assertEquals(sink.rows_written, 3)
+        self.assertEquals(sink.bytes_written, len(f.getvalue()))
+        self.assertEquals(flushes, [(2, 12), (3, 14)])
+
+    def test_interval(self):
+        now = [0.]
+        flushed = threading.Event()
+        f = StringIO()
+        sink = OutputSink(f, flush_interval=0.2, clock=lambda: now[0])
+        sink.flush_callbacks.append(lambda rows, size: flushed.set())
+        sink.write(u"1\n")
+        now[0] = 0.1
+        sink.write(u"2\n")
+        # the timer waits by the clock, not by how long the test takes
+        self.assertFalse(flushed.wait(0.3))
+        self.assertEquals(f.getvalue(), "")
+        # flushed by the timer, without another write
+        now[0] = 0.2
+        self.assertTrue(flushed.wait(5))
+        self.assertEquals(f.getvalue(), "1\n2\n")
+        # the wait starts with the first row in the buffer
+        flushed.clear()
+        sink.write(u"3\n")
+        now[0] = 0.3
+        self.assertFalse(flushed.wait(0.3))
+        now[0] = 0.4
+        self.assertTrue(flushed.wait(5))
+        self.assertEquals(f.getvalue(), "1\n2\n3\n")
+        self.assertTrue(sink.close())
+        sink.timer.join(5)
+        self.assertFalse(sink.timer.is_alive())
+        # errors of the timer are raised by the next call
+        f = open(os.devnull)
+        sink = OutputSink(f, flush_interval=0.2, clock=lambda: now[0])
+        sink.write(u"1\n")
+        now[0] = 1.
+        sink.timer.join(5)
+        self.assertFalse(sink.timer.is_alive())
+        self.assertRaises(IOError, sink.write, u"2\n")
+        f.close()
+
+    def test_broken_pipe(self):
+        sink = OutputSink(ClosedStream(), buffer_size=1)
+        self.assertFalse(sink.write(u"1\n"))
+        self.assertTrue(sink.broken)
+        self.assertFalse(sink.write(u"2\n"))
+        self.assertFalse(sink.close())
+        self.assertEquals(sink.rows_written, 0)
+        # a real pipe whose reader is closed
+        r, w = os.pipe()
+        os.close(r)
+        f = os.fdopen(w, "wb")
+        sink = OutputSink(f, buffer_size=1)
+        self.assertFalse(sink.write(u"1\n"))
+        f.close()
+        # other errors are raised
+        f = open(os.devnull)
+        sink = OutputSink(f, buffer_size=1)
+        self.assertRaises(IOError, sink.write, u"1\n")
+        f.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import unittest
+from parallel import *
+from twitter_acs import TwacsCSV
+from disqus_acs import DiacsCSV
+
+class TestParallel(unittest.TestCase):
+    """Unit tests of multi-process record processing"""
+    def setUp(self):
+        self.datafile = "./data/twitter_sample.json"
+        self.objs = [
+                TwacsCSV("|", None, False, False, False, False, False, False, False)
+                , TwacsCSV("|", None, True, True, True, True, True, True, True)
+                , TwacsCSV(",", "actor:languages:0", True, False, False, False, False, False, False)
+                ]
+
+    def tearDown(self):
+        pass
+
+    def _sequential(self, o, datafile, output_mode=DELIMITED):
+        res = []
+        for i, record in o.file_reader(datafile):
+            out = format_record(o, record, output_mode)
+            if out is not None:
+                res.append(out)
+        return res
+
+    def test_ordered_output(self):
+        for o in self.objs:
+            for mode in [DELIMITED, PRETTY, GEOJSON]:
+                expected = self._sequential(o, self.datafile, mode)
+                # small batches so records are spread over several workers
+                res = list(process_parallel(o, o.line_reader(self.datafile), 3, mode, batch_size=7))
+                self.assertEquals(res, expected)
+
+    def test_unordered_output(self):
+        o = self.objs[1]
+        expected = self._sequential(o, self.datafile)
+        res = list(process_parallel(o, o.line_reader(self.datafile), 3, ordered=False, batch_size=5))
+        self.assertEquals(sorted(res), sorted(expected))
+
+    def test_other_publisher(self):
+        o = DiacsCSV("|", None, True, True, True, True, True)
+        datafile = "./data/disqus_sample.json"
+        expected = self._sequential(o, datafile)
+        res = list(process_parallel(o, o.line_reader(datafile), 2, batch_size=4))
+        self.assertEquals(res, expected)
+
+    def test_early_stop(self):
+        o = self.objs[0]
+        g = process_parallel(o, o.line_reader(self.datafile), 2, batch_size=3)
+        first = g.next()
+        g.close()
+        self.assertEquals(first, self._sequential(o, self.datafile)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
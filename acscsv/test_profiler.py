@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import unittest
+from profiler import *
+from twitter_acs import TwacsCSV
+import twitter_acs_fields
+
+class TestProfiler(unittest.TestCase):
+    """Unit tests of the per-field profile"""
+    def setUp(self):
+        self.datafile = "./data/twitter_sample.json"
+
+    def tearDown(self):
+        pass
+
+    def test_profile(self):
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        expected = [ o.procRecord(r) for i, r in o.file_reader(self.datafile) ]
+        init = twitter_acs_fields.Field_verb.__init__
+        p = o.enable_profile()
+        self.assertNotEquals(twitter_acs_fields.Field_verb.__init__, init)
+        res = [ o.procRecord(r) for i, r in o.file_reader(self.datafile) ]
+        o.disable_profile()
+        self.assertEquals(twitter_acs_fields.Field_verb.__init__, init)
+        self.assertFalse("_profiled_init" in vars(twitter_acs_fields.Field_verb))
+        self.assertEquals(res, expected)
+        d = p.as_dict()
+        n = len(expected)
+        self.assertEquals(d[LOOKUPS]["calls"], n)
+        self.assertEquals(d["Field_activity_type"]["calls"], n)
+        # procRecordToList() and Field_activity_type each create a Field_verb
+        self.assertEquals(d["Field_verb"]["calls"], 2*n)
+        self.assertEquals(d["Field_twitter_entities_urls"]["calls"], 2*n)
+        self.assertTrue(d["Field_activity_type"]["seconds"] > 0)
+        self.assertEquals(p.ranked()[0][0], LOOKUPS)
+        table = p.table().splitlines()
+        self.assertEquals(table[0].split(), ["field", "seconds", "calls", "usec/call"])
+        self.assertEquals(len(table), len(d) + 1)
+        # no time is added after disable_profile()
+        [ o.procRecord(r) for i, r in o.file_reader(self.datafile) ]
+        self.assertEquals(p.as_dict(), d)
+
+    def test_wrap(self):
+        class Base(object):
+            def __init__(self, x):
+                self.x = x
+        class Child(Base):
+            pass
+        p = FieldProfiler()
+        p.wrap([Child, Base])
+        self.assertEquals(Child(1).x, 1)
+        self.assertEquals(Base(2).x, 2)
+        self.assertEquals(p.calls, {"Child": 1, "Base": 1})
+        p.unwrap()
+        self.assertFalse("__init__" in vars(Child))
+        Child(3)
+        self.assertEquals(p.calls, {"Child": 1, "Base": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import unittest
+import json
+from rawscan import *
+from twitter_acs import TwacsCSV
+from disqus_acs import DiacsCSV
+from foursquare_acs import FsqacsCSV
+
+DELETE = '{"verb":"delete","object":{"objectType":"activity","id":"tag:search.twitter.com,2005:351835319794020353"},"actor":{"objectType":"person","id":"id:twitter.com:17"},"postedTime":"2013-07-01T22:50:51.000Z"}'
+DELETE_SPACES = '{"verb": "delete", "object": {"id": "tag:search.twitter.com,2005:999", "link": "http://twitter.com/x/statuses/999"}}\n'
+SCRUB_GEO = '{"id":"tag:search.twitter.com,2005:123","verb":"scrub_geo","actor":{"id":"id:twitter.com:55"},"objectType":"activity"}'
+# these are left to the full decoder
+NESTED_ID = '{"verb":"delete","object":{"actor":{"id":"id:twitter.com:1"},"id":"tag:search.twitter.com,2005:2"}}'
+NO_ID = '{"verb":"delete"}'
+CONCATENATED = DELETE + DELETE
+ESCAPED = '{"verb":"post","body":"\\"verb\\":\\"delete\\"","object":{"id":"tag:search.twitter.com,2005:3"}}'
+NESTED = '{ "id": 1, "body": "a}{b", "object": {"body": "{}", "list": [1, {"x": "]"}, []]}, "ok": true }\n'
+
+class TestRawscan(unittest.TestCase):
+    """Unit tests of raw line scanning"""
+    def setUp(self):
+        self.objs = [
+                TwacsCSV("|", None, True, True, True, True, True, True, True)
+                , DiacsCSV("|", None, True, True, True, True, True)
+                , FsqacsCSV("|", None, True, True, True)
+                ]
+
+    def tearDown(self):
+        pass
+
+    def test_compliance_record(self):
+        self.assertEquals(compliance_record(DELETE)
+                , {"verb": "delete"
+                    , "object": {"id": "tag:search.twitter.com,2005:351835319794020353"}
+                    , "actor": {"id": "id:twitter.com:17"}})
+        self.assertEquals(compliance_record(DELETE_SPACES)
+                , {"verb": "delete", "object": {"id": "tag:search.twitter.com,2005:999"}})
+        self.assertEquals(compliance_record(SCRUB_GEO)
+                , {"verb": "scrub_geo", "actor": {"id": "id:twitter.com:55"}
+                    , "id": "tag:search.twitter.com,2005:123"})
+        self.assertTrue(isinstance(compliance_record(DELETE)["verb"], unicode))
+        self.assertEquals(compliance_record(SCRUB_GEO, verbs=("delete",)), None)
+        for line in [NESTED_ID, NO_ID, CONCATENATED, ESCAPED, "delete", ""]:
+            self.assertEquals(compliance_record(line), None)
+        # long lines are activities
+        self.assertEquals(compliance_record(DELETE[:-1] + ',"x":"' + "a"*COMPLIANCE_MAX_LEN + '"}'), None)
+
+    def test_same_output(self):
+        """The fast path gives the same output as decoding the whole record."""
+        for o in self.objs:
+            for line in [DELETE, DELETE_SPACES, SCRUB_GEO, NESTED_ID, NO_ID]:
+                o.compliance_fast_path = True
+                fast = [ o.procRecord(r) for n, r in o.records([(1, line)]) ]
+                o.compliance_fast_path = False
+                full = [ o.procRecord(r) for n, r in o.records([(1, line)]) ]
+                self.assertEquals(fast, full)
+
+    def test_counter(self):
+        o = self.objs[0]
+        for line in [DELETE, DELETE_SPACES, SCRUB_GEO, NESTED_ID, NO_ID, ESCAPED]:
+            o.decode_line(line, 1)
+        self.assertEquals(o.compliance_count, 3)
+        # the keypath needs the whole record
+        o = TwacsCSV("|", "object:link", False, False, False, False, False, False, False)
+        self.assertEquals(o.decode_line(DELETE_SPACES, 1), [json.loads(DELETE_SPACES)])
+        self.assertEquals(o.compliance_count, 0)
+
+    def test_leading_id(self):
+        self.assertEquals(leading_id(SCRUB_GEO), "tag:search.twitter.com,2005:123")
+        self.assertEquals(leading_id(' { "id" : "1", "body": "x"}\n'), "1")
+        for line in [DELETE, SCRUB_GEO + SCRUB_GEO, SCRUB_GEO + " \t" + SCRUB_GEO, '{"id": "\\/1"}'
+                , '{"id": 1}']:
+            self.assertEquals(leading_id(line), None)
+
+    def test_project_record(self):
+        r = project_record(NESTED, set(["id", "body"]))
+        self.assertEquals(dict.__getitem__(r, "id"), 1)
+        self.assertEquals(dict.__getitem__(r, "body"), u"a}{b")
+        self.assertEquals(r.raw, {"object": '{"body": "{}", "list": [1, {"x": "]"}, []]}', "ok": "true"})
+        self.assertEquals(r["object"]["list"], [1, {"x": "]"}, []])
+        self.assertEquals(r.get("ok"), True)
+        self.assertEquals(r.get("missing", 5), 5)
+        self.assertEquals(r, json.loads(NESTED))
+        self.assertEquals(r.raw, {})
+        for line in ["{}", "", "[1]", '{"a":1{"b":2}', '{"a":1', '{"a":tru}', '{"a":1} {"b":2}'
+                , '{"a":{"b":"}"}', '{"a":{"b":"}}']:
+            self.assertEquals(project_record(line, set(["a"])), None)
+        # brackets in strings, e.g. a :-{ in a tweet, don't end a value
+        probe = '{"o":{"a":"{"},"p":{"b":"}"},"q":1}'
+        r = project_record(probe, set(["q"]))
+        self.assertEquals(r.raw, {"o": '{"a":"{"}', "p": '{"b":"}"}'})
+        self.assertEquals(r, json.loads(probe))
+        self.assertEquals(project_record('{"a":{"b":"}"}}', set(["a"])), {"a": {"b": "}"}})
+        # escaped quotes and backslashes in strings
+        escaped = r'{"o":["\"]", "x\\"],"q":[1]}'
+        r = project_record(escaped, set(["q"]))
+        self.assertEquals(r["q"], [1])
+        self.assertEquals(r, json.loads(escaped))
+
+    def test_projection_output(self):
+        """Projection decoding gives the same output as decoding the whole record."""
+        lines = [ l for l in open("./data/twitter_sample.json") ]
+        lines += [ l for l in open("./data/everything_retweet.json") ]
+        lines += [DELETE, SCRUB_GEO, NESTED_ID, NO_ID]
+        # brackets in nested strings
+        lines.append(lines[0].replace('"summary":"Omfg....BOMBBBBBBB"', '"summary":"Omfg :-{"')
+                .replace('"tag":null', '"tag":"x}"'))
+        objs = [ TwacsCSV("|", None, False, False, False, False, False, False, False) ] + self.objs[:1]
+        for o in objs:
+            full = [ o.procRecord(r) for n, r in o.records(enumerate(lines)) ]
+            o.set_projection()
+            self.assertTrue(o.projection is not None)
+            res = [ o.procRecord(r) for n, r in o.records(enumerate(lines)) ]
+            self.assertEquals(res, full)
+        # the keypath needs the whole record
+        o = TwacsCSV("|", "object:link", False, False, False, False, False, False, False)
+        o.set_projection()
+        self.assertEquals(o.projection, None)
+        # publishers without projection_keys() decode whole records
+        self.objs[1].set_projection()
+        self.assertEquals(self.objs[1].projection, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
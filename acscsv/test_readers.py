@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import bz2
+import glob
+import gzip
+import unittest
+import fileinput
+import tempfile
+from readers import *
+
+class TestReaders(unittest.TestCase):
+    """Unit tests of raw line readers"""
+    def setUp(self):
+        self.datafile = "./data/twitter_sample.json"
+
+    def tearDown(self):
+        pass
+
+    def test_is_plain_file(self):
+        self.assertTrue(is_plain_file(self.datafile))
+        self.assertFalse(is_plain_file("./data/twitter_sample.json.gz"))
+        self.assertFalse(is_plain_file("./data/no_such_file.json"))
+        self.assertFalse(is_plain_file("./data"))
+        self.assertFalse(is_plain_file("-"))
+        self.assertFalse(is_plain_file([]))
+        self.assertFalse(is_plain_file(None))
+
+    def test_file_lines(self):
+        expected = [ r for r in fileinput.FileInput(self.datafile) ]
+        self.assertEquals(list(file_lines(self.datafile)), expected)
+        self.assertEquals(list(file_lines(self.datafile, 100)), expected)
+        # last line without a newline, and an empty file
+        fd, name = tempfile.mkstemp()
+        try:
+            os.write(fd, '{"a": 1}\n\n{"b": 2}')
+            os.close(fd)
+            self.assertEquals(list(file_lines(name)), ['{"a": 1}\n', '\n', '{"b": 2}'])
+            open(name, "w").close()
+            self.assertEquals(list(file_lines(name)), [])
+        finally:
+            os.remove(name)
+
+    def test_split_lines(self):
+        self.assertEquals([ split_range(10, k, 3) for k in [1, 2, 3] ], [(0, 3), (3, 6), (6, 10)])
+        expected = list(file_lines(self.datafile))
+        for n in [1, 2, 3, 7, 100, 1000]:
+            res = []
+            for k in range(1, n + 1):
+                res.extend(split_lines(self.datafile, k, n))
+            self.assertEquals(res, expected)
+        # multi-line records stay in one split; lines not starting records go with the one before
+        lines = ['{\n', '   "a": 1\n', '}\n', '\n', 'not json\n', '{"b": 2}\n', ' {"c": 3}\n', '{"d": 4}']
+        fd, name = tempfile.mkstemp()
+        try:
+            os.write(fd, "".join(lines))
+            os.close(fd)
+            for n in range(1, 60):
+                splits = [ list(split_lines(name, k, n)) for k in range(1, n + 1) ]
+                self.assertEquals(sum(splits, []), lines)
+                for x in splits:
+                    if len(x) > 0:
+                        self.assertTrue(x[0].startswith("{"))
+        finally:
+            os.remove(name)
+
+    def test_compressed_lines(self):
+        gzfile = self.datafile + ".gz"
+        expected = [ r for r in gzip.open(gzfile) ]
+        self.assertTrue(is_compressed_file(gzfile))
+        self.assertFalse(is_compressed_file(self.datafile))
+        self.assertEquals(list(compressed_lines(gzfile)), expected)
+        self.assertEquals(list(compressed_lines(gzfile, 100, 2)), expected)
+        # early stop
+        g = compressed_lines(gzfile, 100, 1)
+        self.assertEquals(g.next(), expected[0])
+        g.close()
+        # concatenated members, and a last line without a newline
+        data = "".join(expected)
+        for ext, compress in [(".gz", self._gzip), (".bz2", bz2.compress)]:
+            fd, name = tempfile.mkstemp(suffix=ext)
+            try:
+                os.write(fd, compress(data) + compress(data) + compress('{"a": 1}'))
+                os.close(fd)
+                self.assertTrue(is_compressed_file(name))
+                self.assertEquals(list(compressed_lines(name, 1000))
+                        , expected + expected + ['{"a": 1}'])
+                # errors are raised by the reader
+                open(name, "wb").write("not compressed")
+                self.assertRaises(Exception, list, compressed_lines(name))
+            finally:
+                os.remove(name)
+
+    def test_compressed_streams(self):
+        data = "".join(gzip.open(self.datafile + ".gz"))
+        for ext, compress in [(".gz", self._gzip), (".bz2", bz2.compress)]:
+            first = compress(data)
+            fd, name = tempfile.mkstemp(suffix=ext)
+            os.close(fd)
+            try:
+                # the first stream ends at the end of a chunk
+                open(name, "wb").write(first + compress('{"a": 1}\n'))
+                for chunk_size in [len(first), len(first) - 1, len(first) + 1]:
+                    self.assertEquals("".join(compressed_lines(name, chunk_size))
+                            , data + '{"a": 1}\n')
+                # truncated, in the first stream and in the last one
+                for cut in [len(first) - 4, len(first) + 6]:
+                    open(name, "wb").write((first + first)[:cut])
+                    self.assertRaises(IOError, list, compressed_lines(name, 1000))
+                # corrupt data, with a wrong checksum in the middle of the file
+                corrupt = first[:-20] + chr(ord(first[-20]) ^ 1) + first[-19:]
+                open(name, "wb").write(corrupt + first)
+                self.assertRaises(IOError, list, compressed_lines(name, 1000))
+            finally:
+                os.remove(name)
+
+    def test_compressed_chunk_sizes(self):
+        """Every sample file comes back whole through gzip and bzip2, in small and odd chunks."""
+        for name in sorted(glob.glob("./data/*.json")):
+            data = open(name, "rb").read()
+            for ext, compress in [(".gz", self._gzip), (".bz2", bz2.compress)]:
+                fd, path = tempfile.mkstemp(suffix=ext)
+                os.close(fd)
+                try:
+                    open(path, "wb").write(compress(data) + compress(data))
+                    for chunk_size in [1, 2, 3, 5, 10, 50, 64, 100, 1000, 4099]:
+                        self.assertEquals("".join(compressed_lines(path, chunk_size))
+                                , data + data, (name, ext, chunk_size))
+                finally:
+                    os.remove(path)
+
+    def test_gzip_padding(self):
+        data = "".join(gzip.open(self.datafile + ".gz"))
+        fd, name = tempfile.mkstemp(suffix=".gz")
+        os.close(fd)
+        try:
+            # zeros after a member, as gzip.open() reads them
+            open(name, "wb").write(self._gzip(data) + "\0"*1000 + self._gzip(data) + "\0"*7)
+            self.assertEquals("".join(gzip.open(name)), data + data)
+            for chunk_size in [1, 7, 1000, CHUNK_SIZE]:
+                self.assertEquals("".join(compressed_lines(name, chunk_size)), data + data)
+        finally:
+            os.remove(name)
+
+    def _gzip(self, data):
+        fd, name = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            f = gzip.open(name, "wb")
+            f.write(data)
+            f.close()
+            return open(name, "rb").read()
+        finally:
+            os.remove(name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,9 +3,13 @@
 __author__="Scott Hendrickson"
 __license__="Simplified BSD"
 
+import csv
 import unittest
+from StringIO import StringIO
 import random
+import calendar
 import string
+import snowflake
 from snowflake import *  
 
 class TestSnowflake(unittest.TestCase):
@@ -141,5 +145,63 @@ class TestSnowflake(unittest.TestCase):
     def test_repr(self):
         self.assertEquals("""###############\nid:      113733024721539072\nseq:     0\nworker:  1\nDS:      1\nSeconds: 1315951040.81\ntime:    2011-09-13T21:57:20\n""",str(self.obj))
 
+    def test_decode_batch(self):
+        ids = [113733024721539072, 351835320003727360, 479311181094469632, 12341324132]
+        numpy = snowflake.numpy
+        try:
+            for np in set([numpy, None]):
+                snowflake.numpy = np
+                d = decode_batch(ids, time_strings=True)
+                for i, x in enumerate(ids):
+                    sf = Snowflake(x)
+                    if sf.timestamp is None:
+                        self.assertFalse(d["valid"][i])
+                        self.assertEquals([d["sequence"][i], d["sample_set"][i], d["time_string"][i]]
+                            , [-1, -1, None])
+                        continue
+                    self.assertTrue(d["valid"][i])
+                    self.assertEquals([d["id"][i], d["sequence"][i], d["worker"][i], d["data_center"][i]
+                        , d["sample_set"][i], d["timestamp"][i], d["time_string"][i]]
+                        , [sf.id, sf.sequence, sf.worker, sf.data_center, sf.sample_set
+                        , sf.timestamp, sf.timeString])
+                self.assertEquals(decode_batch([])["id"].tolist(), [])
+        finally:
+            snowflake.numpy = numpy
+
+    def test_write_rows(self):
+        f = StringIO()
+        ids = [113733024721539072, 12341324132, 351835319794020353]
+        write_rows(ids, csv.writer(f))
+        rows = list(csv.reader(StringIO(f.getvalue())))
+        self.assertEquals([ len(r) for r in rows ], [ROW_COLUMNS]*3)
+        self.assertEquals(rows[1], ["12341324132"] + [""]*(ROW_COLUMNS - 1))
+        self.assertEquals(rows[2][4], Snowflake(ids[2]).timeString)
+
+    def test_encode(self):
+        for x in [113733024721539072, 351835320368635905, 479311181094469632]:
+            sf = Snowflake(x)
+            self.assertEquals(encode(sf.timestamp, sf.data_center, sf.worker, sf.sequence), x)
+            self.assertTrue(min_id(sf.timestamp) <= x <= max_id(sf.timestamp))
+            self.assertTrue(min_id(sf.timestamp, sf.data_center, sf.worker) <= x
+                    <= max_id(sf.timestamp, sf.data_center, sf.worker))
+            self.assertTrue(max_id(sf.timestamp - 0.001) < x < min_id(sf.timestamp + 0.001))
+        self.assertEquals(Snowflake(max_id(1372719051.5)).timeString, "2013-07-01T22:50:51")
+        self.assertRaises(ValueError, encode, 1e9)
+        self.assertRaises(ValueError, encode, 1372719051.5, 32)
+        self.assertRaises(ValueError, max_id, 1372719051.5, None, -1)
+
+    def test_id_range(self):
+        lo, hi = id_range(1372719051, 1372719052)
+        self.assertEquals((lo, hi), (min_id(1372719051), max_id(1372719051.999) + 1))
+        self.assertEquals(id_range(None, 1372719052), (None, hi))
+        self.assertEquals(id_range(0, None), (0, None))
+        # after the last time of the id space
+        last = (TWEPOCH + (1 << SF_TIME_BITS) - 1)/1000.
+        self.assertEquals(id_range(last, last + 0.001), (min_id(last), 1 << 63))
+        self.assertEquals(id_range(calendar.timegm((2090, 1, 1, 0, 0, 0)), None), (1 << 63, None))
+        lo, hi = valid_range()
+        self.assertEquals(Snowflake(lo).timeString is None, False)
+        self.assertEquals(Snowflake(lo - 1).timeString, None)
+
 if __name__ == "__main__":
     unittest.main()
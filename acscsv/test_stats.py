@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import sys
+import unittest
+from StringIO import StringIO
+from stats import *
+from parallel import process_parallel
+from twitter_acs import TwacsCSV
+
+DELETE = '{"verb":"delete","object":{"id":"tag:search.twitter.com,2005:351835319794020353"}}\n'
+
+class TestStats(unittest.TestCase):
+    """Unit tests of run statistics"""
+    def setUp(self):
+        self.datafile = "./data/twitter_sample.json"
+        self.stderr = sys.stderr
+        sys.stderr = StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+
+    def test_disabled(self):
+        o = TwacsCSV("|", None, False, False, False, False, False, False, False)
+        self.assertEquals(o.get_stats(), None)
+        list(o.file_reader(self.datafile))
+
+    def test_stages(self):
+        o = TwacsCSV("|", None, True, True, True, True, True, True, True)
+        expected = [ o.procRecord(r) for i, r in o.file_reader(self.datafile) ]
+        o.enable_stats()
+        lines = open(self.datafile).read() + DELETE + "not json\n"
+        res = [ o.procRecord(r) for i, r in o.file_reader(json_string=lines) ]
+        self.assertEquals(res[:-1], expected)
+        d = o.get_stats()
+        self.assertEquals(d["counts"]["lines"], len(expected) + 2)
+        self.assertEquals(d["counts"]["bytes"], len(lines))
+        self.assertEquals(d["counts"]["records"], len(expected) + 1)
+        self.assertEquals(d["counts"]["errors"], 1)
+        self.assertEquals(d["counts"]["compliance"], 1)
+        for k in ["read", "decode", "extract", "clean"]:
+            self.assertTrue(d["seconds"][k] > 0, k)
+        self.assertTrue(d["elapsed"] >= sum(d["seconds"].values()))
+        self.assertTrue(d["records_per_sec"] > 0)
+        summary = o.stats.summary().splitlines()
+        self.assertEquals(summary[0].split(), ["stage", "seconds", "share"])
+        self.assertEquals(summary[-5].split(), ["errors", "1"])
+
+    def test_progress(self):
+        out = StringIO()
+        st = Stats(progress_interval=0, out=out)
+        for i in range(2*PROGRESS_CHECK + 1):
+            st.record()
+        self.assertEquals(len(out.getvalue().splitlines()), 2)
+        self.assertTrue(" 2000 records " in out.getvalue().splitlines()[-1])
+        st.merge({"seconds": {"write": 1.5}, "counts": {"records": 10, "errors": 2}})
+        self.assertEquals(st.worker_seconds["write"], 1.5)
+        self.assertEquals(st.seconds["write"], 0.)
+        self.assertEquals(st.counts["records"], 2*PROGRESS_CHECK + 11)
+        self.assertEquals(st.counts["errors"], 2)
+
+    def test_parallel(self):
+        o = TwacsCSV("|", None, False, False, False, False, False, False, False)
+        o.enable_stats()
+        res = list(process_parallel(o, o.line_reader(self.datafile), 2, batch_size=7))
+        d = o.get_stats()
+        self.assertEquals(d["counts"]["records"], len(res))
+        self.assertEquals(d["counts"]["lines"], len(open(self.datafile).readlines()))
+        self.assertTrue(d["worker_seconds"]["extract"] > 0)
+        # worker times aren't shares of the elapsed time
+        self.assertEquals(d["seconds"]["extract"], 0.)
+        self.assertTrue(d["elapsed"] >= sum(d["seconds"].values()))
+        summary = o.stats.summary().splitlines()
+        self.assertEquals(summary[0].split(), ["stage", "seconds", "share", "worker", "wall"])
+        self.assertEquals(float(summary[3].split()[-1]), round(d["worker_seconds"]["extract"], 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
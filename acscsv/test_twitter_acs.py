@@ -317,6 +317,30 @@ class TestTwitter_acs(unittest.TestCase):
                 record_string = o.procRecord(record)
                 self.assertEquals(len(record_string.split("|")), self.record_lengths[j])
  
+    def test_extraction_plan(self):
+        """
+        Check that a compiled ExtractionPlan gives the same values as the Field_ objects for
+        every record in the sample file.
+        """
+        datafile = "./data/twitter_sample.json"
+        fields = [ obj for name, obj in inspect.getmembers(sys.modules[__name__])
+                    if name.startswith("Field_") ]
+        plan = acscsv.ExtractionPlan()
+        for f in fields:
+            plan.add(f)
+        self.assertEquals(len(plan.labels()), len(fields))
+        o = self.processing_objs[-1]
+        for i, record in o.file_reader(datafile):
+            self.assertEquals(plan.run(record), [ f(record).value for f in fields ])
+        # the plan also handles the missing and null values (no snowflake in these)
+        fields = [ f for f in fields if f is not Field_snowflake ]
+        plan = acscsv.ExtractionPlan()
+        for f in fields:
+            plan.add(f)
+        for record in [ {}, {"actor": None, "gnip": {"profileLocations": []}} 
+                , {"gnip": {"profileLocations": [ {"address": {"country": "Narnia"}} ]}} ]:
+            self.assertEquals(plan.run(record), [ f(record).value for f in fields ])
+
     def test_valid_objects(self):
         for n,x in self.objs:
             self.assertTrue(isinstance(x,acscsv._Field))
@@ -4,10 +4,13 @@ __license__="Simplified BSD"
 
 import sys
 import acscsv
+import twitter_acs_fields
 from twitter_acs_fields import *
 
 class TwacsCSV(acscsv.AcsCSV):
     """Subset of Twitter fields with specified delimiter.  Please see help for options"""
+    compliance_verbs = ("delete", "scrub_geo")
+
 
     def __init__(self
                 , delim
@@ -28,10 +31,8 @@ class TwacsCSV(acscsv.AcsCSV):
         self.options_lang = options_lang
         self.options_influence = options_influence
         self.options_struct = options_struct
-        # pre-create all of teh objects needed for parsing
-        #for name, obj in inspect.getmembers(sys.modules[__name__]):
-        #    if name.startswith("Field_"):
-        #        setattr(self, name.lower()+"_", obj(None))
+        # compile the output fields for the active options once, see get_output_list()
+        self.extraction_plan = self.build_extraction_plan()
 
     def procRecordToList(self, d):
         """
@@ -78,19 +79,18 @@ class TwacsCSV(acscsv.AcsCSV):
         return self.get_output_list(d) 
 
 
-    def get_output_list(self, d):
+    def build_extraction_plan(self):
         """
-        Take a JSON Activity Streams payload as a Python dictionary. Specify the particular 
-        output fields (and their order) by constructing and returning a list of the 
-        desired extractor values. Default values for missing fields are set in the _Field class 
+        Specify the particular output fields (and their order) by adding the desired extractors 
+        to an ExtractionPlan. Default values for missing fields are set in the _Field class 
         and can be overridden.  
         """
-        output_list = [] 
+        plan = acscsv.ExtractionPlan()
 
         # base output = id | timestamp | body
-        output_list.append( Field_id(d).value )
-        output_list.append( Field_postedtime(d).value )
-        output_list.append( Field_body(d).value )
+        plan.add( Field_id )
+        plan.add( Field_postedtime )
+        plan.add( Field_body )
 
         # urls 
         if self.options_urls:
@@ -99,95 +99,133 @@ class TwacsCSV(acscsv.AcsCSV):
             # https://github.com/DrSkippy/Gnacs/blob/16dd146fb05d02d7c1e3f282254e6718fd13303f/acscsv/twacscsv.py#L97 
             #
             # gnip 
-            val = Field_gnip_urls(d).value
-            if isinstance(val, list): 
-                output_list.append( self.buildListString( [ x["expanded_url"] for x in val ] ) )  
-            else: 
-                output_list.append( val )  
+            plan.add( Field_gnip_urls, self._list_of("expanded_url") )
             # twitter
-            val = Field_twitter_entities_urls(d).value  
-            if isinstance(val, list):
-                url_list = self.buildListString( [ x["url"] for x in val ] ) 
-                exp_url_list = self.buildListString( [ x["expanded_url"] for x in val ] ) 
-            else:
-                url_list = val
-                exp_url_list = val 
-            output_list.append( url_list )  
-            output_list.append( exp_url_list )  
+            plan.add( Field_twitter_entities_urls, self._list_of("url") )
+            plan.add( Field_twitter_entities_urls, self._list_of("expanded_url") )
     
         # languages 
         if self.options_lang:
             # actor
             #   - this field has *very* infrequently contained unicode chars. drop them.
-            output_list.append( Field_actor_language(d).value.encode('ascii', 'ignore') ) 
+            plan.add( Field_actor_language, lambda val: val.encode('ascii', 'ignore') ) 
             # classifications
-            output_list.append( Field_gnip_language_value(d).value ) 
-            output_list.append( Field_twitter_lang(d).value ) 
+            plan.add( Field_gnip_language_value ) 
+            plan.add( Field_twitter_lang ) 
     
         # rules
         if self.options_rules:
-            val = Field_gnip_rules(d).value 
-            if isinstance(val, list):
-                # output: '[" value (tag)", ... ]'
-                output_list.append( 
-                    self.buildListString( 
-                        [ "{} ({})".format( x["value"], x["tag"] ) for x in Field_gnip_rules(d).value ]
-                        )
-                    ) 
-            else: 
-                output_list.append( val )  
+            # output: '[" value (tag)", ... ]'
+            plan.add( Field_gnip_rules, self._rules_list )
 
         # geo-related fields
         if self.options_geo:
             # geo-tag 
-            val = Field_geo_coordinates(d).value
-            # keep self.geoCoordsList for backward compatibility
-            self.geoCoordsList = None
-            if isinstance(val, list):
-                output_list.append( str(val) ) 
-                self.geoCoordsList = val 
-            else:
-                output_list.append( val ) 
-            output_list.append( Field_geo_type(d).value )
-            val = Field_location_geo_coordinates(d).value 
-            if isinstance(val, list): 
-                output_list.append( str(val) )  
-            else:
-                output_list.append( val )  
-            output_list.append( Field_location_geo_type(d).value )
-            output_list.append( Field_location_displayname(d).value )  
-            output_list.append( Field_location_twitter_country_code(d).value )  
+            plan.add( Field_geo_coordinates, self._geo_coords )
+            plan.add( Field_geo_type )
+            plan.add( Field_location_geo_coordinates, self._str_list )
+            plan.add( Field_location_geo_type )
+            plan.add( Field_location_displayname )
+            plan.add( Field_location_twitter_country_code )
             # user  
-            output_list.append( Field_actor_utcoffset(d).value )  
-            output_list.append( Field_actor_location_displayname(d).value )  
+            plan.add( Field_actor_utcoffset )
+            plan.add( Field_actor_location_displayname )
             # profileLocations
-            output_list.append( Field_gnip_profilelocations_displayname(d).value )  
-            output_list.append( Field_gnip_profilelocations_objecttype(d).value )  
-            output_list.append( Field_gnip_profilelocations_address_country(d).value )  
-            output_list.append( Field_gnip_profilelocations_address_region(d).value )  
-            output_list.append( Field_gnip_profilelocations_address_countrycode(d).value )  
-            output_list.append( Field_gnip_profilelocations_address_locality(d).value )  
-            output_list.append( Field_gnip_profilelocations_geo_type(d).value )  
-            output_list.append( Field_gnip_profilelocations_geo_coordinates(d).value )  
+            plan.add( Field_gnip_profilelocations_displayname )
+            plan.add( Field_gnip_profilelocations_objecttype )
+            plan.add( Field_gnip_profilelocations_address_country )
+            plan.add( Field_gnip_profilelocations_address_region )
+            plan.add( Field_gnip_profilelocations_address_countrycode )
+            plan.add( Field_gnip_profilelocations_address_locality )
+            plan.add( Field_gnip_profilelocations_geo_type )
+            plan.add( Field_gnip_profilelocations_geo_coordinates )
 
         # user
         if self.options_user:
-            output_list.append( Field_actor_displayname(d).value )  
-            output_list.append( Field_actor_preferredusername(d).value )  
-            output_list.append( Field_actor_id(d).value )  
+            plan.add( Field_actor_displayname )
+            plan.add( Field_actor_preferredusername )
+            plan.add( Field_actor_id )
             
         # user connections, klout
         if self.options_influence:
-            output_list.append( Field_gnip_klout_score(d).value )  
-            output_list.append( Field_actor_followerscount(d).value )  
-            output_list.append( Field_actor_friendscount(d).value )  
-            output_list.append( Field_actor_listedcount(d).value )  
-            output_list.append( Field_actor_statusesCount(d).value )  
+            plan.add( Field_gnip_klout_score )
+            plan.add( Field_actor_followerscount )
+            plan.add( Field_actor_friendscount )
+            plan.add( Field_actor_listedcount )
+            plan.add( Field_actor_statusesCount )
              
         # structure
         if self.options_struct:
-            output_list.append( Field_activity_type(d).value )  
+            plan.add( Field_activity_type )
+
+        # done building output plan 
+        return plan
+
+    def projection_keys(self):
+        """
+        Top-level keys used by the extraction plan, and the verb checked by procRecordToList(). 
+        Compliance and system messages, and fields of the whole record (empty path), read 
+        other keys, which are decoded when used.
+        """
+        return set([ f.path[0] for f in self.extraction_plan.fields if f.path ] + ["verb"])
+
+    def batch_rows(self, records):
+        """
+        Yield (position in records, output list) of each activity in records, see
+        AcsCSV.batch_rows(). The verb is checked here, and the extraction plan run directly.
+        An activity missing a key a post-processor needs, e.g. a url without expanded_url,
+        gives the error row [GNIPERROR, GNIPREMOVE], where procRecordToList() raises KeyError.
+        """
+        run = self.extraction_plan.run
+        skip = set(self.compliance_verbs + ("error", "warning", "info"))
+        keypaths = self.keyPaths if self.options_keypath else None
+        for i, x in enumerate(records):
+            if x.get("verb") in skip:
+                continue
+            try:
+                row = run(x)
+            except KeyError:
+                yield i, [acscsv.gnipError, acscsv.gnipRemove]
+                continue
+            if keypaths is not None:
+                row.extend(keypaths(x, raw=True))
+            yield i, row
+
+    def field_classes(self):
+        """All the Field_* classes of twitter_acs_fields, see AcsCSV.enable_profile()."""
+        return [ x for name, x in sorted(vars(twitter_acs_fields).items()) 
+                    if name.startswith("Field_") and isinstance(x, type) ]
+
+    def _list_of(self, key):
+        """Return a post-processor that builds a list string from key in a list of dicts."""
+        def post(val):
+            if isinstance(val, list): 
+                return self.buildListString( [ x[key] for x in val ] )
+            return val
+        return post
+
+    def _rules_list(self, val):
+        if isinstance(val, list):
+            return self.buildListString( [ "{} ({})".format( x["value"], x["tag"] ) for x in val ] )
+        return val
 
-        # done building output list 
-        return output_list 
+    def _str_list(self, val):
+        if isinstance(val, list): 
+            return str(val)
+        return val
+
+    def _geo_coords(self, val):
+        # keep self.geoCoordsList for backward compatibility
+        self.geoCoordsList = None
+        if isinstance(val, list):
+            self.geoCoordsList = val 
+            return str(val)
+        return val
+
+    def get_output_list(self, d):
+        """
+        Take a JSON Activity Streams payload as a Python dictionary. Return the list of 
+        output field values by running the extraction plan built from the options. 
+        """
+        return self.extraction_plan.run(d)
 
@@ -21,34 +21,33 @@ class Field_activity_type(acscsv._Field):
     label = 'Activity Type'
     path = []
     
-    def __init__(self, json_record):
-        super(
-            Field_activity_type
-            , self).__init__(json_record)
-        # self.value is None
-        if json_record is not None:
-            verb = Field_verb(json_record).value 
-            rec_id = Field_id(json_record).value  
-            inReplyTo = "None"
-            obj_objtype = "None"
-            if "inReplyTo" in json_record:
-                # get the url
-                inReplyTo = json_record["inReplyTo"]["link"]
-                # get the original id from the url
-                rec_id = inReplyTo.split("/")[-1]
-            if "object" in json_record:
-                obj = json_record["object"]
-                if "objectType" in obj:
-                    obj_objtype = obj["objectType"]
-            # now we can determine self.value
-            if verb == "share" and obj_objtype == "activity":
-                self.value = "Retweet"
-            elif inReplyTo == "None":
-                self.value = "Tweet"
-            else:
-                self.value = "Reply"
-            # tack on the upstream activity id (or this id, for Tweets)  
-            self.value += " ({})".format(rec_id)
+    @classmethod
+    def fix_value(cls, json_record):
+        # the empty path means the value is the whole record 
+        if json_record == cls.default_value:
+            return json_record
+        verb = Field_verb(json_record).value 
+        rec_id = Field_id(json_record).value  
+        inReplyTo = "None"
+        obj_objtype = "None"
+        if "inReplyTo" in json_record:
+            # get the url
+            inReplyTo = json_record["inReplyTo"]["link"]
+            # get the original id from the url
+            rec_id = inReplyTo.split("/")[-1]
+        if "object" in json_record:
+            obj = json_record["object"]
+            if "objectType" in obj:
+                obj_objtype = obj["objectType"]
+        # now we can determine the value
+        if verb == "share" and obj_objtype == "activity":
+            value = "Retweet"
+        elif inReplyTo == "None":
+            value = "Tweet"
+        else:
+            value = "Reply"
+        # tack on the upstream activity id (or this id, for Tweets)  
+        return value + " ({})".format(rec_id)
 
 
 
@@ -70,21 +69,18 @@ class Field_id(acscsv._Field):
     label = 'Tweet ID'
     path = ['id']
     
-    def __init__(self, json_record):
-        super(
-            Field_id
-            , self).__init__(json_record)
-        tmp = self.value.split(":")
+    @classmethod
+    def fix_value(cls, value):
+        tmp = value.split(":")
         if len(tmp) >= 3:
-            self.value = tmp[2]
+            return tmp[2]
+        return value
 
 class Field_snowflake(Field_id):
-    def __init__(self, json_record):
-        super(
-            Field_snowflake
-            , self).__init__(json_record)
-        sf = Snowflake(self.value)
-        self.value = "_".join([str(sf.id), sf.timeString, str(sf.sample_set)])
+    @classmethod
+    def fix_value(cls, value):
+        sf = Snowflake(super(Field_snowflake, cls).fix_value(value))
+        return "_".join([str(sf.id), sf.timeString, str(sf.sample_set)])
 
 
 class Field_objecttype(acscsv._Field):
@@ -263,123 +259,62 @@ class _Field_gnip_profilelocations_base(acscsv._Field):
     serves as the base for subfields of profileLocations.
     """ 
     label = 'Profile Geo: Data Structure'
-    path = ['gnip', 'profileLocations']
-
-    def __init__(self, json_record):
-        super(
-            _Field_gnip_profilelocations_base 
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            # if we found the list, we really want the first (only) thing in it
-            self.value = self.value[0]
+    # if we found the list, we really want the first (only) thing in it
+    path = ['gnip', 'profileLocations', 0]
 
 
 class Field_gnip_profilelocations_displayname(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].displayName."""
     label = 'Profile Geo: Name'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_displayname 
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['displayName'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['displayName']
 
 
 class Field_gnip_profilelocations_objecttype(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].objectType"""
     label = 'Profile Geo: Object Type'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_objecttype
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['objectType'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['objectType']
 
 
 class Field_gnip_profilelocations_geo_type(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].geo.type"""
     label = 'Profile Geo: Type'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_geo_type
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['geo', 'type'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['geo', 'type']
 
 
 class Field_gnip_profilelocations_geo_coordinates(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].geo.coordinates"""
     label = 'Profile Geo: Coordinates'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_geo_coordinates
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['geo', 'coordinates'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['geo', 'coordinates']
 
 
 class Field_gnip_profilelocations_address_country(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].address.country"""
     label = 'Profile Geo: Country'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_address_country
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['address', 'country'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['address', 'country']
 
 
 class Field_gnip_profilelocations_address_countrycode(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].address.countryCode"""
     label = 'Profile Geo: Country Code'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_address_countrycode
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['address', 'countryCode'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['address', 'countryCode']
 
 
 class Field_gnip_profilelocations_address_locality(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].address.locality"""
     label = 'Profile Geo: Locality'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_address_locality
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['address', 'locality'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['address', 'locality']
 
 
 class Field_gnip_profilelocations_address_region(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].address.region"""
     label = 'Profile Geo: Region'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_address_region
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['address', 'region'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['address', 'region']
 
 
 class Field_gnip_profilelocations_address_subregion(_Field_gnip_profilelocations_base):
     """Take a dict, assign to self.value the value of gnip.profileLocations[0].address.subRegion"""
     label = 'Profile Geo: Subregion'
-
-    def __init__(self, json_record):
-        super(
-            Field_gnip_profilelocations_address_subregion
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            self.value = self.walk_path( self.value, path = ['address', 'subRegion'] ) 
+    path = _Field_gnip_profilelocations_base.path + ['address', 'subRegion']
 
 
 
@@ -395,13 +330,12 @@ class Field_actor_id(acscsv._Field):
     label = 'User ID'
     path = ['actor', 'id']
     
-    def __init__(self, json_record):
-        super(
-            Field_actor_id
-            , self).__init__(json_record)
-        if self.value != self.default_value:
-            # self.value has an id:twitter....
-            self.value = self.value.split(":")[2]
+    @classmethod
+    def fix_value(cls, value):
+        if value != cls.default_value:
+            # value has an id:twitter....
+            value = value.split(":")[2]
+        return value
 
 
 class Field_actor_objecttype(acscsv._Field):
@@ -415,17 +349,15 @@ class Field_actor_postedtime(acscsv._Field):
     label = 'User Account Creation Date'
     path = ['actor', 'postedTime']
     
-    def __init__(self, json_record):
-        super(
-            Field_actor_postedtime 
-            , self).__init__(json_record)
-        # self.value is a string (of a timestamp) 
+    @classmethod
+    def fix_value(cls, value):
+        # value is a string (of a timestamp) 
         input_fmt = "%Y-%m-%dT%H:%M:%S.000Z"
         try:
-            # default_t_fmt defined in _Field constructor
-            self.value = datetime.strptime(self.value, input_fmt).strftime(self.default_t_fmt) 
+            # default_t_fmt defined in _Field class
+            return datetime.strptime(value, input_fmt).strftime(cls.default_t_fmt) 
         except ValueError:
-            self.value = "INVALID_DATE_FORMAT"
+            return "INVALID_DATE_FORMAT"
 
 
 class Field_actor_displayname(acscsv._Field):
@@ -466,13 +398,12 @@ class Field_actor_language(acscsv._Field):
     label = 'User-chosen Language'
     path = ['actor', 'languages']
     
-    def __init__(self, json_record):
-        super(
-            Field_actor_language
-            , self).__init__(json_record)
-        # self.value is a list, but have only ever seen it with one value, so take that one. 
-        if self.value != self.default_value:
-            self.value = self.value[0]
+    @classmethod
+    def fix_value(cls, value):
+        # value is a list, but have only ever seen it with one value, so take that one. 
+        if value != cls.default_value:
+            value = value[0]
+        return value
 
 
 class Field_actor_links(acscsv._Field):
@@ -480,11 +411,6 @@ class Field_actor_links(acscsv._Field):
     label = 'User Account Bio URLs'
     path = ['actor', 'links']
 
-    def __init__(self, json_record):
-        super(
-            Field_actor_links
-            , self).__init__(json_record)
-
 
 class Field_actor_twittertimezone(acscsv._Field):
     """Take a dict, assign to self.value the value of actor.twitterTimeZone"""
@@ -666,13 +592,12 @@ class Field_location_geo_coordinates(acscsv._Field):
     label = 'Geo-tag: Place Coordinates'
     path = ['location', 'geo', 'coordinates']
 
-    def __init__(self, json_record):
-        super(
-            Field_location_geo_coordinates 
-            , self).__init__(json_record)
+    @classmethod
+    def fix_value(cls, value):
         # this list has only been observed to contain another list of the bounding vertices 
-        if self.value != self.default_value:
-            self.value = self.value[0]
+        if value != cls.default_value:
+            value = value[0]
+        return value
 
 
 
@@ -7,6 +7,8 @@ import acscsv
 
 class WPacsCSV(acscsv.AcsCSV):
     """Word press activites"""
+    compliance_verbs = ("delete",)
+
     def __init__(self, delim, options_keypath, options_user, options_rules, options_lang, options_struct):
         super(WPacsCSV, self).__init__(delim,options_keypath)
         self.options_user = options_user
@@ -9,10 +9,10 @@ try:
 except pkg_resources.DistributionNotFound:
     __version__ = "N/A"
 import sys
-import codecs
 import fileinput
 import re
 import os
+import time
 import argparse
 from acscsv import *
 # needed only for the pretty-printing
@@ -28,7 +28,33 @@ except ImportError:
 
 # unicode input
 reload(sys)
-sys.stdout = codecs.getwriter('utf-8')(sys.stdout)
+
+def part_arg(value):
+    """Parse a command line argument of the form 'K/N' into a tuple of ints (K, N), 1 <= K <= N."""
+    try:
+        k, n = [ int(x) for x in value.split("/") ]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected K/N, e.g. 1/4, got %s"%value)
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError("expected 1 <= K <= N, got %s"%value)
+    return k, n
+
+def time_arg(value):
+    """Parse a command line UTC time, e.g. 2013-07-01T22:00:00, into seconds since the epoch."""
+    try:
+        return filters.parse_time(value)
+    except ValueError, e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def percent_arg(value):
+    """Parse a command line percent, 0 < P <= 100."""
+    try:
+        p = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a percent, e.g. 1, got %s"%value)
+    if not 0 < p <= 100:
+        raise argparse.ArgumentTypeError("expected 0 < P <= 100, got %s"%value)
+    return p
 
 def gnacs_args():
     """Parse comand line arguemnts for defining input and output of command line utility."""
@@ -84,16 +110,56 @@ def gnacs_args():
             , default="twitter"
 			, help="Publisher (default is twitter), twitter, newsgator, disqus, \
                     wordpress, wpcomments, tumblr, foursquare, getglue, stocktwits, stocktwits-native")
-    parser.add_argument("-k","--keypath", dest="keypath"
+    parser.add_argument("-k","--keypath", dest="keypath", action="append"
+            , default=None
+			, help="returns a value from a path of the form 'key:value'; repeat for more columns, \
+                    '*' matches every list item, e.g. 'twitter_entities:hashtags:*:text'")
+    parser.add_argument("--workers", dest="workers", type=int
+            , default=1
+			, help="Number of worker processes (default is 1, no worker processes)")
+    parser.add_argument("--unordered", action="store_true", dest="unordered"
+            , default=False
+			, help="With --workers, write output as batches finish instead of in input order")
+    parser.add_argument("--projection", action="store_true", dest="projection"
+            , default=False
+			, help="Decode only the parts of each record used by the output fields (Twitter only)")
+    parser.add_argument("--split", dest="split", type=part_arg
+            , default=None
+			, help="Process only the Kth of N newline-aligned byte ranges (K/N) of a plain input file")
+    parser.add_argument("--shard", dest="shard", type=part_arg
+            , default=None
+			, help="Output only the records in the Ith of N shards (I/N), picked by a hash of the activity id")
+    parser.add_argument("--since", dest="since", type=time_arg
+            , default=None
+			, help="Output only the activities posted at or after this UTC time, e.g. 2013-07-01T22:00:00")
+    parser.add_argument("--until", dest="until", type=time_arg
             , default=None
-			, help="returns a value from a path of the form 'key:value'")
+			, help="Output only the activities posted before this UTC time, e.g. 2013-07-01T23:00:00")
+    parser.add_argument("--index", action="store_true", dest="index"
+            , default=False
+			, help="Build the offset index of a plain input file if it has none or it is out of date; with --since/--until, only the indexed blocks in the time window are decoded")
+    parser.add_argument("--sample", dest="sample", type=percent_arg, metavar="P"
+            , default=None
+			, help="Output only the records whose snowflake sample set is below P, a P%% sample")
+    parser.add_argument("--checkpoint", dest="checkpoint", default=None, metavar="FILE"
+			, help="Save the position of the run in FILE every few seconds; if FILE exists, resume the run from it, appending to the output file (use >>)")
+    parser.add_argument("--stats", action="store_true", dest="stats"
+            , default=False
+			, help="Write the time spent in each processing stage, and record counts, to stderr at exit")
+    parser.add_argument("--progress", dest="progress", type=float
+            , default=None
+			, help="With --stats, also write a progress line to stderr every PROGRESS seconds")
+    parser.add_argument("--profile-fields", action="store_true", dest="profile_fields"
+            , default=False
+			, help="Write a table of the time spent in each output field to stderr at exit (Twitter only)")
     return parser
 
 if __name__ == "__main__":
     """Use gnacs delimited-field parsing libraries as a command line tool to parse a series of JSON
     formatted actvities from file, compressed file or standard input (stdin)."""
     
-    options = gnacs_args().parse_args()
+    parser = gnacs_args()
+    options = parser.parse_args()
     if options.ver:
         print "*"*70
         print "Gnacs Version: %s"%__version__
@@ -101,14 +167,28 @@ if __name__ == "__main__":
         print "sudo pip install gnacs --upgrade to install the latest version."
         print "*"*70
         sys.exit()
+    if options.split and not readers.is_plain_file(options.file_name):
+        parser.error("--split needs an uncompressed input file name")
+    if options.index and not readers.is_plain_file(options.file_name):
+        parser.error("--index needs an uncompressed input file name")
+    if options.checkpoint and not (readers.is_plain_file(options.file_name)
+            or readers.is_compressed_file(options.file_name)):
+        parser.error("--checkpoint needs an input file name")
+    if options.checkpoint and (options.workers > 1 or options.split or options.geojson):
+        parser.error("--checkpoint can't be used with --workers, --split or --geojson")
+    if options.profile_fields and options.workers > 1:
+        parser.error("--profile-fields can't be used with --workers")
     #
     delim = "|"     # default delimiter
     if options.csv:
         delim = "," # csv delimiter
     elif options.geojson:
         options.geo = True 
+    # buffered utf-8 output
+    sink = output.OutputSink(sys.stdout)
+    if options.geojson:
         # note: geojson option creates an in-memory structure
-        sys.stdout.write('{"type": "FeatureCollection", "features": [')
+        sink.write('{"type": "FeatureCollection", "features": [')
     #
     if options.pub.lower().startswith("word") or options.pub.lower().startswith("wp"):
         processing_obj = wordpress_acs.WPacsCSV(delim
@@ -182,43 +262,87 @@ if __name__ == "__main__":
 			, options.struct
             )
     #
-    first_geo = True 
-    for line_number, record in processing_obj.file_reader(options.file_name): 
-        if options.pretty:
-            print json_printer.dumps(record, indent=3, ensure_ascii=False)
-            continue 
+    output_mode = parallel.DELIMITED
+    if options.pretty:
+        output_mode = parallel.PRETTY
+        # print the full compliance records
+        processing_obj.compliance_fast_path = False
+    elif options.geojson:
+        output_mode = parallel.GEOJSON
+    if options.projection and not options.pretty:
+        processing_obj.set_projection()
+    if options.shard:
+        processing_obj.add_filter(filters.ShardFilter(*options.shard))
+    # with --index, only the blocks that can hold the time window are decoded
+    id_range = None
+    if options.since is not None or options.until is not None:
+        window = filters.TimeWindowFilter(options.since, options.until)
+        processing_obj.add_filter(window)
+        if options.index:
+            id_range = (window.lo, window.hi)
+    if options.index:
+        offset_index.build_index(options.file_name)
+    # position to resume from
+    start = None
+    run_checkpoint = None
+    if options.checkpoint:
+        run_checkpoint = checkpoint.Checkpoint(options.checkpoint, options.file_name, sink)
         try:
-            if options.explain:
-                #### TODO: fix -x option for new extractors ####
-                print >>sys.stderr, "\n****\n\n'explain' functionality currently unavailable\n\n****\n"
-                sys.exit()
-                ################################################
-                record = reflect_json.reflect_json(record)
-                sys.stdout.write("%s\n"%processing_obj.procRecord(record))
-            elif options.geojson:
-                # geo-tag coords
-                geo_rec = processing_obj.asGeoJSON(record)
-                if geo_rec is not None:
-                    if not first_geo: 
-                        sys.stdout.write(",")
-                    sys.stdout.write(json.dumps(geo_rec))
-                    first_geo = False
-            else:
-                # ensure formatter is working on a unicode object 
-                sys.stdout.write(u"{}\n".format(processing_obj.procRecord(record, emptyField="None")))
-        # handle I/O exceptions associated with writing to stdout (e.g. when output is piped to 'head')
-        # TODO: handle this via contextmanager (within AcsCSV)? 
-        except IOError, e:
-            try:
-                sys.stdout.close()
-            except IOError:
-                pass
-            try:
-                sys.stderr.close()
-            except IOError:
-                pass
+            start = run_checkpoint.begin(sys.stdout)
+        except ValueError, e:
+            parser.error("can't resume from the checkpoint: %s"%e)
+        processing_obj.set_checkpoint(run_checkpoint)
+    if options.sample is not None:
+        processing_obj.add_filter(filters.SampleFilter(options.sample))
+    if options.stats or options.progress:
+        processing_obj.enable_stats(options.progress)
+    if options.profile_fields:
+        if not processing_obj.field_classes():
+            parser.error("--profile-fields isn't supported for the %s publisher"%options.pub)
+        processing_obj.enable_profile()
+    if options.explain:
+        #### TODO: fix -x option for new extractors ####
+        print >>sys.stderr, "\n****\n\n'explain' functionality currently unavailable\n\n****\n"
+        sys.exit()
+        ################################################
+    if options.workers > 1:
+        outputs = parallel.process_parallel(processing_obj
+                , processing_obj.line_reader(options.file_name, split=options.split
+                    , id_range=id_range)
+                , options.workers
+                , output_mode
+                , ordered=not options.unordered
+                )
+    else:
+        outputs = (parallel.format_record(processing_obj, record, output_mode) 
+                    for line_number, record in processing_obj.file_reader(options.file_name
+                        , split=options.split, id_range=id_range, start=start))
+    #
+    first_geo = True 
+    write_start = None
+    for out in outputs:
+        if out is None:
+            continue
+        if processing_obj.stats is not None:
+            write_start = time.time()
+        if options.geojson:
+            if not first_geo: 
+                sink.write(",")
+            first_geo = False
+        # stop when the reader goes away (e.g. when output is piped to 'head')
+        if not sink.write(out):
             break
+        if write_start is not None:
+            processing_obj.stats.add("write", time.time() - write_start)
     # close the geojson data structure
     if options.geojson:
-        sys.stdout.write(']}\n')            
+        sink.write(']}\n')
+    sink.close()
+    if run_checkpoint is not None and not sink.broken:
+        run_checkpoint.save(*processing_obj.input_position, complete=True)
+    if processing_obj.stats is not None and not sys.stderr.closed:
+        print >>sys.stderr, processing_obj.stats.summary()
+    if processing_obj.profiler is not None and not sys.stderr.closed:
+        processing_obj.disable_profile()
+        print >>sys.stderr, processing_obj.profiler.table()            
 
@@ -0,0 +1,4 @@
+__all__ = [
+        'bench'
+        , 'generate'
+        ]
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import sys
+import time
+import json
+import socket
+import argparse
+import datetime
+import itertools
+from acscsv import *
+
+"""
+Throughput benchmarks for the publisher classes. Inputs are built by replaying the sample
+files in data/ up to a chosen size, and each publisher is run for a set of option
+combinations. Results (records/sec and MB/sec) are written to a JSON file, and a stored
+baseline can be compared with new results to flag regressions. Run from the top of the 
+repository, e.g.
+
+    python -m perf.bench run -n 20000 -o results.json
+    python -m perf.bench compare baseline.json results.json
+"""
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# publisher name: (class, sample file, constructor args after the delimiter). "keypath" 
+# is passed None, all the others are gnacs boolean options.
+PUBLISHERS = {
+        "twitter": (twitter_acs.TwacsCSV, "twitter_sample.json"
+            , ["keypath", "geo", "user", "rules", "urls", "lang", "influence", "struct"])
+        , "disqus": (disqus_acs.DiacsCSV, "disqus_sample.json"
+            , ["keypath", "user", "rules", "lang", "struct", "status"])
+        , "tumblr": (tumblr_acs.TblracsCSV, "tumblr_sample.json"
+            , ["keypath", "user", "rules", "lang", "struct"])
+        , "wordpress": (wordpress_acs.WPacsCSV, "wp-com_sample.json"
+            , ["keypath", "user", "rules", "lang", "struct"])
+        , "foursquare": (foursquare_acs.FsqacsCSV, "foursquare_sample.json"
+            , ["keypath", "geo", "user", "rules"])
+        , "stocktwits": (stocktwits_acs.StacsCSV, "stocktwits_sample.json"
+            , ["user", "struct", "influence", "keypath"])
+        , "stocktwits-native": (stocktwits_native.StocktwitsNative, "stocktwits_native_sample.json"
+            , ["keypath", "user", "struct", "influence"])
+        , "newsgator": (newsgator_acs.NGacsCSV, "newsgator_sample.json"
+            , ["keypath", "urls", "user"])
+        }
+
+# relative drop in records/sec flagged by compare
+THRESHOLD = 0.1
+
+def publisher_options(publisher):
+    """Return the list of boolean option names of publisher."""
+    return [ x for x in PUBLISHERS[publisher][2] if x != "keypath" ]
+
+def make_processing_obj(publisher, options, delim="|"):
+    """Return the processing object for publisher with the options (list of names) set."""
+    cls, sample, args = PUBLISHERS[publisher]
+    return cls(delim, *[ None if x == "keypath" else x in options for x in args ])
+
+def option_combinations(publisher, all_combinations=False):
+    """
+    Return a list of option lists: no options, each option alone, and all the options. 
+    With all_combinations, return every subset of the options.
+    """
+    names = publisher_options(publisher)
+    if all_combinations:
+        return [ list(c) for i in range(len(names) + 1) 
+                    for c in itertools.combinations(names, i) ]
+    res = [[]] + [ [x] for x in names ]
+    if len(names) > 1:
+        res.append(names)
+    return res
+
+def combination_name(publisher, options):
+    """Return the result key, e.g. twitter:geo+user or twitter:default."""
+    return "{}:{}".format(publisher, "+".join(options) if options else "default")
+
+def replay_lines(filename, records=None, megabytes=None):
+    """
+    Return a list of raw lines built by repeating the non-empty lines of filename until 
+    there are the given number of records, or megabytes of input. With neither, the file
+    is read once.
+    """
+    lines = [ r for r in open(filename, "rb") if r.strip() ]
+    if len(lines) == 0 or (records is None and megabytes is None):
+        return lines
+    res = []
+    size = 0
+    for r in itertools.cycle(lines):
+        if records is not None and len(res) >= records:
+            break
+        if megabytes is not None and size >= megabytes*1e6:
+            break
+        res.append(r)
+        size += len(r)
+    return res
+
+def measure(publisher, options, lines, repeat=3):
+    """
+    Decode and format lines with a new processing object, repeat times. Return a dict of 
+    the fastest run: records, bytes, seconds, records_per_sec and mb_per_sec.
+    """
+    size = sum([ len(r) for r in lines ])
+    best = None
+    n = 0
+    stderr = sys.stderr
+    # keep the "Field missing" warnings of some samples out of the timings
+    sys.stderr = open(os.devnull, "w")
+    try:
+        for i in range(repeat):
+            processing_obj = make_processing_obj(publisher, options)
+            n = 0
+            start = time.time()
+            for line_number, record in processing_obj.records(enumerate(lines, 1)):
+                processing_obj.procRecord(record)
+                n += 1
+            seconds = time.time() - start
+            if best is None or seconds < best:
+                best = seconds
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+    best = max(best, 1e-9)
+    return {
+            "records": n
+            , "bytes": size
+            , "seconds": best
+            , "records_per_sec": n/best
+            , "mb_per_sec": size/best/1e6
+            }
+
+def run(publishers=None
+        , records=None
+        , megabytes=None
+        , repeat=3
+        , all_combinations=False
+        , input_files=None
+        , log=None
+        ):
+    """
+    Run the benchmarks and return the results dict, with "meta" information about the run
+    and "results" keyed by combination_name(). input_files maps publisher names to input 
+    files used instead of the samples.
+    """
+    if publishers is None:
+        publishers = sorted(PUBLISHERS)
+    if input_files is None:
+        input_files = {}
+    results = {}
+    for publisher in publishers:
+        filename = input_files.get(publisher
+                , os.path.join(DATA_DIR, PUBLISHERS[publisher][1]))
+        lines = replay_lines(filename, records, megabytes)
+        for options in option_combinations(publisher, all_combinations):
+            name = combination_name(publisher, options)
+            res = measure(publisher, options, lines, repeat)
+            res["input"] = filename
+            results[name] = res
+            if log is not None:
+                log.write("{:<50} {:>10.0f} records/sec {:>8.2f} MB/sec\n".format(
+                    name, res["records_per_sec"], res["mb_per_sec"]))
+    return {
+            "meta": {
+                "date": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+                , "host": socket.gethostname()
+                , "python": sys.version.split()[0]
+                , "json": json.__name__
+                , "records": records
+                , "megabytes": megabytes
+                , "repeat": repeat
+                }
+            , "results": results
+            }
+
+def compare(baseline, results, threshold=THRESHOLD):
+    """
+    Compare two results dicts from run(). Return a list of (name, baseline records/sec, 
+    records/sec, relative change, regression) tuples for the names in both, where 
+    regression is True if records/sec dropped by more than threshold.
+    """
+    res = []
+    for name in sorted(set(baseline["results"]) & set(results["results"])):
+        old = baseline["results"][name]["records_per_sec"]
+        new = results["results"][name]["records_per_sec"]
+        change = (new - old)/old if old > 0 else 0.0
+        res.append((name, old, new, change, change < -threshold))
+    return res
+
+def bench_args():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks for gnacs publishers.")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and write the results")
+    run_parser.add_argument("-z", "--publisher", dest="pubs", action="append"
+            , choices=sorted(PUBLISHERS)
+            , help="Publisher to run (repeat for several, default is all)")
+    run_parser.add_argument("-n", "--records", dest="records", type=int, default=None
+            , help="Replay each sample up to this number of records")
+    run_parser.add_argument("-m", "--megabytes", dest="megabytes", type=float, default=None
+            , help="Replay each sample up to this size in MB")
+    run_parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=3
+            , help="Runs per combination, the fastest is kept (default 3)")
+    run_parser.add_argument("-a", "--all-combinations", dest="all_combinations"
+            , action="store_true", default=False
+            , help="Run every combination of options, not just each option alone and all")
+    run_parser.add_argument("-i", "--input", dest="inputs", action="append", default=[]
+            , metavar="PUBLISHER=FILE"
+            , help="Replay FILE instead of the sample for PUBLISHER")
+    run_parser.add_argument("-o", "--output", dest="output", default="bench_results.json"
+            , help="Results file (default bench_results.json)")
+    compare_parser = subparsers.add_parser("compare", help="Compare results with a baseline")
+    compare_parser.add_argument("baseline", help="Baseline results file")
+    compare_parser.add_argument("results", help="New results file")
+    compare_parser.add_argument("-t", "--threshold", dest="threshold", type=float
+            , default=THRESHOLD
+            , help="Relative drop in records/sec flagged as a regression (default %s)"%THRESHOLD)
+    return parser
+
+if __name__ == "__main__":
+    options = bench_args().parse_args()
+    if options.command == "run":
+        input_files = dict([ x.split("=", 1) for x in options.inputs ])
+        res = run(options.pubs
+                , options.records
+                , options.megabytes
+                , options.repeat
+                , options.all_combinations
+                , input_files
+                , log=sys.stdout
+                )
+        with open(options.output, "w") as f:
+            json.dump(res, f, indent=3, sort_keys=True)
+        print "Results written to {}".format(options.output)
+    else:
+        baseline = json.load(open(options.baseline))
+        results = json.load(open(options.results))
+        regressions = 0
+        for name, old, new, change, regression in compare(baseline, results, options.threshold):
+            print "{:<50} {:>10.0f} {:>10.0f} {:>+7.1%}{}".format(
+                    name, old, new, change, "  REGRESSION" if regression else "")
+            regressions += regression
+        if regressions > 0:
+            print "{} regression(s) of more than {:.0%}".format(regressions, options.threshold)
+            sys.exit(1)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import re
+import sys
+import time
+import random
+import calendar
+import argparse
+import collections
+# ujson doesn't keep key order, and escapes "/"
+import json
+from acscsv.reflect_json import reflect_json
+
+"""
+Synthetic activities for scale testing. An ActivityGenerator learns the structure of a
+publisher's sample file: the top-level keys of each record, the values seen for each key,
+and (with reflect_json's labels) where the activity ids and timestamps are. It mixes these
+into a pool of record variants, then writes any number of records from the pool with new
+ids and timestamps, and delete and scrub_geo compliance messages at a configured mix.
+The output only depends on the sample file and the seed. Run from the top of the
+repository, e.g.
+
+    python -m perf.generate -z twitter -s 2G --seed 1 -o big_twitter.json
+"""
+
+# output mix of record types
+MIX = {"activity": 0.97, "delete": 0.025, "scrub_geo": 0.005}
+# number of distinct record variants built from the sample
+VARIANTS = 1000
+# activities per second of generated time, and the first timestamp
+RATE = 100.
+START = "2013-07-01T00:00:00"
+TIME_FMT = "%Y-%m-%dT%H:%M:%S"
+# ids of recent activities that deletes are picked from
+RECENT_IDS = 10000
+# snowflake epoch (ms), see acscsv/snowflake.py
+TWEPOCH = 1288834974657
+
+# the activity content keys are kept together, the other top-level values are mixed
+CONTENT_KEYS = set(["id", "verb", "object", "body", "link", "objectType", "postedTime", "created_at"])
+# labels (see reflect_json.walk_label) of the activity timestamps
+TIME_LABELS = set(["postedTime", "created_at", "object:postedTime"])
+# geo-tag keys, present or not together
+GEO_KEYS = ["geo", "location"]
+
+timeRE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+# the part of an id that identifies the activity, e.g. a snowflake or a hex key, and
+# (for other ids) the name after the type, e.g. hosqas in comment/hosqas/post
+idKeyRE = re.compile(r'(?<![0-9A-Za-z])(?=[0-9A-Za-z]*\d)[0-9A-Za-z]{6,}(?![0-9A-Za-z])')
+idNameRE = re.compile(r'/([0-9A-Za-z]{4,})(?:/|$)')
+
+# placeholders in the serialized variants
+ID_SLOT = "@@GNACS_ID@@"
+NUMBER_ID_SLOT = "@@GNACS_NUMBER_ID@@"
+TIME_SLOT = "@@GNACS_TIME@@"
+
+def parse_size(value):
+    """Parse a size such as 500M or 2G into a number of bytes."""
+    units = {"K": 1e3, "M": 1e6, "G": 1e9}
+    if value[-1].upper() in units:
+        return int(float(value[:-1])*units[value[-1].upper()])
+    return int(value)
+
+def parse_mix(value):
+    """Parse a mix such as activity=0.9,delete=0.1 into a dict."""
+    res = dict([ (k, 0.) for k in MIX ])
+    for x in value.split(","):
+        k, v = x.split("=")
+        if k not in MIX:
+            raise ValueError("unknown record type %s"%k)
+        res[k] = float(v)
+    return res
+
+class ActivityGenerator(object):
+    """Write synthetic records modeled on the records of a sample file."""
+
+    def __init__(self, sample_file, seed=0, mix=None, geo=None, variants=VARIANTS
+            , rate=RATE, start=START):
+        """
+        Learn the sample_file records. mix gives the relative numbers of activities, deletes
+        and scrub_geo messages (see MIX). geo is the fraction of activities with geo-tags
+        (default as in the sample), for publishers with geo-tags.
+        """
+        self.rng = random.Random(seed)
+        self.mix = MIX if mix is None else mix
+        self.rate = rate
+        self.start_ms = calendar.timegm(time.strptime(start, TIME_FMT))*1000
+        self.records = []
+        for r in open(sample_file):
+            try:
+                x = json.loads(r, object_pairs_hook=collections.OrderedDict)
+            except ValueError:
+                continue
+            if isinstance(x, dict) and x.get("verb") not in ("delete", "scrub_geo"):
+                self.records.append(x)
+        if len(self.records) == 0:
+            raise ValueError("no activities in %s"%sample_file)
+        # values seen for each top-level key
+        self.values = collections.defaultdict(list)
+        for x in self.records:
+            for k, v in x.items():
+                self.values[k].append(v)
+        self.geo_records = [ x for x in self.records if x.get(GEO_KEYS[0]) ]
+        self.geo = geo
+        if self.geo is None:
+            self.geo = len(self.geo_records)/float(len(self.records))
+        self.variants = [ self._variant() for i in range(variants) ]
+        self.count = 0
+        self.ms = self.start_ms
+        self.recent_ids = collections.deque(maxlen=RECENT_IDS)
+
+    def _variant(self):
+        """
+        Return (format string, id format string, actor id) for a new mix of the sample
+        records. The format strings take the %(id)s and %(time)s of each generated record;
+        the actor id is None for records without one.
+        """
+        template = self.rng.choice(self.records)
+        x = collections.OrderedDict()
+        for k in template:
+            if k in CONTENT_KEYS:
+                x[k] = template[k]
+            else:
+                x[k] = self.rng.choice(self.values[k])
+        if self.geo_records:
+            if self.rng.random() < self.geo:
+                source = self.rng.choice(self.geo_records)
+                for k in GEO_KEYS:
+                    if k in source:
+                        x[k] = source[k]
+            else:
+                x.pop(GEO_KEYS[0], None)
+        # copy the shared sample values; walk_label() needs plain dicts
+        s = json.dumps(x)
+        x = json.loads(s, object_pairs_hook=collections.OrderedDict)
+        labels = reflect_json(json.loads(s))
+        # the key of the id is replaced in every string holding it, e.g. links
+        old_id = None
+        id_format = None
+        if isinstance(x.get("id"), (int, long)):
+            old_id = str(x["id"])
+            id_format = "%(id)s"
+        elif isinstance(x.get("id"), basestring):
+            m = idKeyRE.search(timeRE.sub("", x["id"])) or idNameRE.search(x["id"])
+            if m is not None:
+                old_id = m.group(m.lastindex or 0)
+                id_format = x["id"].replace("%", "%%").replace(old_id, "%(id)s")
+                id_format = timeRE.sub("%(time)s", id_format).encode("utf-8")
+        actor_id = None
+        if isinstance(x.get("actor"), dict) and "id" in x["actor"]:
+            actor_id = json.dumps(unicode(x["actor"]["id"]))[1:-1]
+        x = self._slots(x, labels, old_id)
+        s = json.dumps(x, separators=(",", ":"), ensure_ascii=False)
+        if isinstance(s, unicode):
+            s = s.encode("utf-8")
+        s = s.replace("%", "%%").replace('"%s"'%NUMBER_ID_SLOT, "%(id)s")
+        s = s.replace(ID_SLOT, "%(id)s").replace(TIME_SLOT, "%(time)s")
+        return s, id_format, actor_id
+
+    def _slots(self, x, label, old_id):
+        """Put the id and time placeholders in x, with labels from reflect_json."""
+        if isinstance(x, dict):
+            for k in x:
+                if isinstance(label, dict) and k in label:
+                    x[k] = self._slots(x[k], label[k], old_id)
+        elif isinstance(x, list):
+            for i, v in enumerate(x):
+                if isinstance(label, list) and len(label) > 0:
+                    x[i] = self._slots(v, label[0], old_id)
+        elif isinstance(x, basestring):
+            if old_id is not None and old_id in x:
+                x = x.replace(old_id, ID_SLOT)
+            if label in TIME_LABELS or label == "id":
+                x = timeRE.sub(TIME_SLOT, x, 1)
+        elif isinstance(x, (int, long)) and old_id is not None and str(x) == old_id:
+            # numeric ids stay numbers, see _variant()
+            x = NUMBER_ID_SLOT
+        return x
+
+    def _next(self):
+        """Advance the clock. Return (snowflake id, time string) for the next record."""
+        self.count += 1
+        self.ms += int(self.rng.expovariate(self.rate)*1000)
+        # the count in the worker and sequence bits keeps ids unique
+        sf = ((self.ms - TWEPOCH) << 22) | (self.count & 0x3fffff)
+        return sf, time.strftime(TIME_FMT, time.gmtime(self.ms//1000))
+
+    def record(self):
+        """Return the next record (str, without newline)."""
+        kind = self._kind()
+        sf, t = self._next()
+        # compliance messages as Gnip sends them, with the ids of a recent activity and
+        # its actor, without a top-level postedTime or objectType
+        if kind == "delete" and len(self.recent_ids) > 0:
+            activity_id, actor_id = self.rng.choice(self.recent_ids)
+            if actor_id is None:
+                return '{"verb":"delete","object":{"objectType":"activity","id":"%s"}}'%activity_id
+            return ('{"verb":"delete","object":{"objectType":"activity","id":"%s"},'
+                    '"actor":{"objectType":"person","id":"%s"}}')%(activity_id, actor_id)
+        if kind == "scrub_geo" and len(self.geo_records) > 0 and len(self.recent_ids) > 0:
+            activity_id, actor_id = self.rng.choice(self.recent_ids)
+            if actor_id is not None:
+                # geo-tags of the actor are removed up to this activity
+                return ('{"verb":"scrub_geo","actor":{"objectType":"person","id":"%s"},'
+                        '"object":{"objectType":"activity","id":"%s"}}')%(actor_id, activity_id)
+        fmt, id_format, actor_id = self.rng.choice(self.variants)
+        values = {"id": sf, "time": t}
+        if id_format is not None:
+            self.recent_ids.append((id_format%values, actor_id))
+        return fmt%values
+
+    def _kind(self):
+        total = sum(self.mix.values())
+        x = self.rng.random()*total
+        for k in sorted(self.mix):
+            x -= self.mix[k]
+            if x < 0:
+                return k
+        return "activity"
+
+    def lines(self, records=None, size=None):
+        """
+        Yield lines (with newline) until there are records lines, or size bytes. With
+        neither, yield lines forever.
+        """
+        n = 0
+        written = 0
+        while (records is None or n < records) and (size is None or written < size):
+            r = self.record() + "\n"
+            n += 1
+            written += len(r)
+            yield r
+
+    def write(self, f, records=None, size=None):
+        """Write lines to the file object f, see lines(). Return the number of bytes written."""
+        written = 0
+        buf = []
+        for r in self.lines(records, size):
+            buf.append(r)
+            written += len(r)
+            if len(buf) >= 1000:
+                f.write("".join(buf))
+                buf = []
+        f.write("".join(buf))
+        return written
+
+def generate_args():
+    parser = argparse.ArgumentParser(description="Write synthetic activities for scale testing.")
+    parser.add_argument("-z", "--publisher", dest="pub", default="twitter"
+            , help="Publisher whose sample in data/ is the model (default twitter)")
+    parser.add_argument("-f", "--sample", dest="sample", default=None
+            , help="Sample file to model instead of the publisher sample")
+    parser.add_argument("-n", "--records", dest="records", type=int, default=None
+            , help="Number of records")
+    parser.add_argument("-s", "--size", dest="size", type=parse_size, default=None
+            , help="Output size, e.g. 500M or 2G")
+    parser.add_argument("--seed", dest="seed", type=int, default=0
+            , help="Random seed (default 0); the same seed gives the same output")
+    parser.add_argument("--mix", dest="mix", type=parse_mix, default=None
+            , help="Relative numbers of record types, e.g. activity=0.9,delete=0.08,scrub_geo=0.02")
+    parser.add_argument("--geo", dest="geo", type=float, default=None
+            , help="Fraction of activities with geo-tags (default as in the sample)")
+    parser.add_argument("--variants", dest="variants", type=int, default=VARIANTS
+            , help="Number of distinct record variants (default %d)"%VARIANTS)
+    parser.add_argument("-o", "--output", dest="output", default=None
+            , help="Output file (default standard output)")
+    return parser
+
+if __name__ == "__main__":
+    import os
+    from perf.bench import PUBLISHERS, DATA_DIR
+    options = generate_args().parse_args()
+    if options.records is None and options.size is None:
+        options.records = 1000
+    sample = options.sample
+    if sample is None:
+        sample = os.path.join(DATA_DIR, PUBLISHERS[options.pub][1])
+    gen = ActivityGenerator(sample, options.seed, options.mix, options.geo, options.variants)
+    f = sys.stdout if options.output is None else open(options.output, "wb")
+    gen.write(f, options.records, options.size)
+    f.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import unittest
+from perf.bench import *
+
+class TestBench(unittest.TestCase):
+    """Unit tests of the benchmark suite"""
+    def setUp(self):
+        self.datafile = os.path.join(DATA_DIR, "twitter_sample.json")
+
+    def tearDown(self):
+        pass
+
+    def test_publishers(self):
+        for publisher in PUBLISHERS:
+            for options in option_combinations(publisher):
+                o = make_processing_obj(publisher, options)
+                for x in publisher_options(publisher):
+                    self.assertEquals(getattr(o, "options_" + x), x in options)
+        self.assertEquals(len(option_combinations("twitter")), 9)
+        self.assertEquals(len(option_combinations("twitter", True)), 2**7)
+        self.assertEquals(combination_name("twitter", []), "twitter:default")
+        self.assertEquals(combination_name("twitter", ["geo", "user"]), "twitter:geo+user")
+
+    def test_replay_lines(self):
+        lines = replay_lines(self.datafile)
+        self.assertEquals(replay_lines(self.datafile, records=3), lines[:3])
+        self.assertEquals(replay_lines(self.datafile, records=len(lines) + 2), lines + lines[:2])
+        res = replay_lines(self.datafile, megabytes=0.5)
+        self.assertTrue(sum([ len(r) for r in res[:-1] ]) < 0.5e6 <= sum([ len(r) for r in res ]))
+
+    def test_run_compare(self):
+        res = run(["twitter", "disqus"], records=20, repeat=1)
+        self.assertEquals(len(res["results"]), 9 + 7)
+        x = res["results"]["twitter:default"]
+        self.assertEquals(x["records"], 20)
+        self.assertTrue(x["records_per_sec"] > 0 and x["mb_per_sec"] > 0)
+        baseline = {"results": {"a": {"records_per_sec": 100.}, "b": {"records_per_sec": 100.}
+                , "c": {"records_per_sec": 100.}}}
+        results = {"results": {"a": {"records_per_sec": 95.}, "b": {"records_per_sec": 80.}
+                , "d": {"records_per_sec": 10.}}}
+        self.assertEquals(compare(baseline, results)
+                , [("a", 100., 95., -0.05, False), ("b", 100., 80., -0.2, True)])
+        self.assertEquals(compare(baseline, results, 0.25)[1][4], False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+__author__="Scott Hendrickson, Josh Montague"
+__license__="Simplified BSD"
+
+import os
+import json
+import unittest
+from StringIO import StringIO
+from perf.generate import *
+from perf.bench import DATA_DIR, PUBLISHERS, make_processing_obj
+
+class TestGenerate(unittest.TestCase):
+    """Unit tests of the synthetic activity generator"""
+    def setUp(self):
+        self.datafile = os.path.join(DATA_DIR, "twitter_sample.json")
+
+    def tearDown(self):
+        pass
+
+    def test_seed(self):
+        lines = list(ActivityGenerator(self.datafile, 1, variants=200).lines(500))
+        self.assertEquals(len(lines), 500)
+        self.assertEquals(list(ActivityGenerator(self.datafile, 1, variants=200).lines(500)), lines)
+        self.assertNotEquals(list(ActivityGenerator(self.datafile, 2, variants=200).lines(500)), lines)
+        f = StringIO()
+        written = ActivityGenerator(self.datafile, seed=1, variants=200).write(f, size=100000)
+        self.assertEquals(written, len(f.getvalue()))
+        self.assertTrue(100000 <= written < 100000 + max([ len(r) for r in lines ]))
+
+    def test_records(self):
+        mix = parse_mix("activity=0.8,delete=0.15,scrub_geo=0.05")
+        gen = ActivityGenerator(self.datafile, seed=1, mix=mix, geo=0.5)
+        records = [ json.loads(r) for r in gen.lines(2000) ]
+        verbs = [ x["verb"] for x in records ]
+        self.assertTrue(1500 < verbs.count("post") + verbs.count("share") < 1700)
+        self.assertTrue(250 < verbs.count("delete") < 350)
+        self.assertTrue(70 < verbs.count("scrub_geo") < 130)
+        activities = [ x for x in records if x["verb"] in ("post", "share") ]
+        ids = [ x["id"] for x in activities ]
+        self.assertEquals(len(set(ids)), len(ids))
+        # deletes are for generated activities
+        deleted = set([ x["object"]["id"] for x in records if x["verb"] == "delete" ])
+        self.assertTrue(deleted <= set(ids))
+        # compliance messages have the shape of Gnip's
+        actors = dict([ (x["id"], x["actor"]["id"]) for x in activities ])
+        for x in records:
+            if x["verb"] in ("delete", "scrub_geo"):
+                self.assertEquals(sorted(x.keys()), ["actor", "object", "verb"])
+                self.assertEquals(actors[x["object"]["id"]], x["actor"]["id"])
+        # ids, links and timestamps agree, and time goes forward
+        times = [ x["postedTime"] for x in activities ]
+        self.assertEquals(times, sorted(times))
+        for x in activities:
+            if x["verb"] == "post":
+                self.assertEquals(x["object"]["id"].split(":")[-1], x["id"].split(":")[-1])
+            self.assertTrue(x["link"].endswith(x["id"].split(":")[-1]))
+        geo = len([ x for x in activities if x.get("geo") ])
+        self.assertTrue(0.4 < geo/float(len(activities)) < 0.6)
+
+    def test_publishers(self):
+        """Every publisher can process records generated from its sample."""
+        for publisher in PUBLISHERS:
+            gen = ActivityGenerator(os.path.join(DATA_DIR, PUBLISHERS[publisher][1]), seed=1
+                    , variants=100)
+            o = make_processing_obj(publisher, [])
+            lines = list(gen.lines(200))
+            records = [ r for i, r in o.records(enumerate(lines, 1)) ]
+            self.assertTrue(len(records) > 150)
+            for r in records:
+                o.procRecord(r)
+        self.assertEquals(parse_size("2G"), 2000000000)
+        self.assertEquals(parse_size("1.5M"), 1500000)
+        self.assertEquals(parse_size("100"), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()